@@ -9,6 +9,37 @@ class Settings:
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
     
+    # Sentence embedding model
+    embedding_model: str = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+    embedding_dimension: int = int(os.getenv("EMBEDDING_DIMENSION", "384"))
+    
+    # Model inference executor (0 = derive from the number of physical cores)
+    inference_mode: str = os.getenv("INFERENCE_MODE", "thread")  # thread or process
+    inference_workers: int = int(os.getenv("INFERENCE_WORKERS", "0"))
+    inference_torch_threads: int = int(os.getenv("INFERENCE_TORCH_THREADS", "0"))
+    inference_max_queue: int = int(os.getenv("INFERENCE_MAX_QUEUE", "32"))
+    inference_queue_timeout_seconds: float = float(os.getenv("INFERENCE_QUEUE_TIMEOUT_SECONDS", "1.0"))
+    inference_timeout_seconds: float = float(os.getenv("INFERENCE_TIMEOUT_SECONDS", "10.0"))
+    inference_max_batch_texts: int = int(os.getenv("INFERENCE_MAX_BATCH_TEXTS", "64"))
+    
+    # Semantic search result cache
+    semantic_cache_size: int = int(os.getenv("SEMANTIC_CACHE_SIZE", "256"))
+    semantic_cache_threshold: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+    semantic_cache_top_k: int = int(os.getenv("SEMANTIC_CACHE_TOP_K", "100"))
+    
+    # Precomputed "similar recipes" lists
+    neighbor_count: int = int(os.getenv("NEIGHBOR_COUNT", "10"))
+    neighbor_block_size: int = int(os.getenv("NEIGHBOR_BLOCK_SIZE", "1024"))
+    
+    # Background embedding queue
+    embedding_workers: int = int(os.getenv("EMBEDDING_WORKERS", "2"))
+    embedding_batch_size: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "16"))
+    embedding_max_attempts: int = int(os.getenv("EMBEDDING_MAX_ATTEMPTS", "5"))
+    embedding_retry_base_seconds: float = float(os.getenv("EMBEDDING_RETRY_BASE_SECONDS", "2"))
+    embedding_retry_max_seconds: float = float(os.getenv("EMBEDDING_RETRY_MAX_SECONDS", "300"))
+    embedding_poll_seconds: float = float(os.getenv("EMBEDDING_POLL_SECONDS", "5"))
+    embedding_lease_seconds: float = float(os.getenv("EMBEDDING_LEASE_SECONDS", "300"))
+    
     # CORS settings
     allowed_origins: list = [
         "http://localhost:3000",
@@ -1,3 +1,4 @@
+from databases import Database
 from sqlalchemy import create_engine, MetaData
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.config import settings
@@ -8,6 +9,9 @@ engine = create_engine(settings.database_url, echo=True)
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async connection pool used by the services for raw SQL queries
+database = Database(settings.database_url)
+
 # Metadata and Base for models
 metadata = MetaData()
 Base = declarative_base()
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, JSON, LargeBinary, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from datetime import datetime
 
 Base = declarative_base()
@@ -21,11 +21,56 @@ class Recipe(Base):
     tags = Column(JSON)  # Store as JSON array
     
     # Semantic search fields
-    embedding = Column(JSON)  # Store vector embedding as JSON
+    embedding = Column(JSON)  # Legacy single vector embedding as JSON
+    # Per-field embeddings stored as raw float32 bytes
+    title_embedding = Column(LargeBinary)  # title + description
+    ingredients_embedding = Column(LargeBinary)
+    instructions_embedding = Column(LargeBinary)  # mean of chunk embeddings
+    embedding_status = Column(String(20), nullable=False, server_default="pending")  # pending, ready, failed
+    content_version = Column(Integer, nullable=False, server_default="0")  # bumped when embedded content changes
     
     # Metadata
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     def __repr__(self):
-        return f"<Recipe(id={self.id}, title='{self.title}')>"
\ No newline at end of file
+        return f"<Recipe(id={self.id}, title='{self.title}')>"
+
+class RecipeNeighbor(Base):
+    __tablename__ = "recipe_neighbors"
+    
+    # Precomputed top-k most similar recipes, ordered by rank (0 = most similar)
+    recipe_id = Column(Integer, ForeignKey("recipes.id", ondelete="CASCADE"), primary_key=True)
+    rank = Column(Integer, primary_key=True)
+    neighbor_id = Column(Integer, ForeignKey("recipes.id", ondelete="CASCADE"), nullable=False, index=True)
+    score = Column(Float, nullable=False)
+    
+    __table_args__ = (
+        # Finds recipes whose last neighbor scores below a new candidate
+        Index("ix_recipe_neighbors_rank_score", "rank", "score"),
+    )
+    
+    def __repr__(self):
+        return f"<RecipeNeighbor(recipe_id={self.recipe_id}, rank={self.rank}, neighbor_id={self.neighbor_id})>"
+
+class EmbeddingJob(Base):
+    __tablename__ = "embedding_jobs"
+    
+    # Durable queue of recipes waiting for embeddings, drained by EmbeddingWorkerPool
+    id = Column(Integer, primary_key=True)
+    recipe_id = Column(Integer, ForeignKey("recipes.id", ondelete="CASCADE"), nullable=False, index=True)
+    status = Column(String(20), nullable=False, server_default="queued")  # queued, running, failed
+    attempts = Column(Integer, nullable=False, server_default="0")
+    available_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    locked_at = Column(DateTime(timezone=True))
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        Index("ix_embedding_jobs_status_available_at", "status", "available_at"),
+        # At most one queued job per recipe; running and failed jobs are not limited
+        Index("ix_embedding_jobs_queued_recipe_id", "recipe_id", unique=True, postgresql_where=text("status = 'queued'")),
+    )
+    
+    def __repr__(self):
+        return f"<EmbeddingJob(id={self.id}, recipe_id={self.recipe_id}, status='{self.status}')>"
\ No newline at end of file
@@ -1,18 +1,40 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import List, Optional
-from app.schemas.recipe import Recipe, RecipeCreate, RecipeUpdate, RecipeSearchResult, SemanticSearchRequest
-# Temporarily comment out ML services
+from app.config import settings
+from app.database import database
+from app.schemas.recipe import Recipe, RecipeCreate, RecipeUpdate, RecipeSearchResult, SemanticSearchRequest, SimilarRecipe
+# Temporarily comment out ML services; the endpoints below use these names and
+# stay inactive until the imports are restored and this router is included in app/main.py
 # from app.services.recipe_service import RecipeService
 # from app.services.semantic_search_service import SemanticSearchService
+# from app.services.neighbor_service import NeighborService
+# from app.services.embedding_queue import EmbeddingWorkerPool
+# from app.services.inference_executor import InferenceOverloaded, InferenceTimeout, get_inference_executor
 
 router = APIRouter()
 
+@router.on_event("startup")
+async def start_embedding_workers():
+    """Connect to the database and start draining the embedding queue"""
+    await database.connect()
+    EmbeddingWorkerPool.start(settings.embedding_workers)
+
+@router.on_event("shutdown")
+async def stop_embedding_workers():
+    """Stop the embedding workers and inference pool; unfinished jobs are picked up again on restart"""
+    await EmbeddingWorkerPool.stop()
+    get_inference_executor().shutdown()
+    await database.disconnect()
+
 def get_recipe_service():
     return RecipeService()
 
 def get_search_service():
     return SemanticSearchService()
 
+def get_neighbor_service():
+    return NeighborService()
+
 @router.post("/", response_model=Recipe)
 async def create_recipe(
     recipe: RecipeCreate, 
@@ -50,6 +72,20 @@ async def get_recipe(
         raise HTTPException(status_code=404, detail="Recipe not found")
     return recipe
 
+@router.get("/{recipe_id}/similar", response_model=List[SimilarRecipe])
+async def get_similar_recipes(
+    recipe_id: int,
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of similar recipes"),
+    service: NeighborService = Depends(get_neighbor_service),
+    recipe_service: RecipeService = Depends(get_recipe_service)
+):
+    """Get precomputed similar recipes for a recipe"""
+    similar = await service.get_similar(recipe_id, limit)
+    if not similar:
+        if not await recipe_service.get_recipe_by_id(recipe_id):
+            raise HTTPException(status_code=404, detail="Recipe not found")
+    return similar
+
 @router.put("/{recipe_id}", response_model=Recipe)
 async def update_recipe(
     recipe_id: int,
@@ -78,12 +114,17 @@ async def semantic_search(
     search_request: SemanticSearchRequest,
     search_service: SemanticSearchService = Depends(get_search_service)
 ):
-    """Perform semantic search on recipes"""
+    """Perform semantic search on recipes, weighting title, ingredient and instruction similarity"""
     try:
         return await search_service.semantic_search(
             search_request.query, 
             search_request.limit, 
-            search_request.min_score
+            search_request.min_score,
+            search_request.weights.model_dump()
         )
+    except InferenceOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except InferenceTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
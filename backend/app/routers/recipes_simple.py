@@ -2,11 +2,12 @@ from fastapi import APIRouter
 from typing import Dict
 from pydantic import BaseModel
 from typing import List, Optional
+from app.services.recipe_catalog import RecipeCatalog
 
 router = APIRouter()
 
 # In-memory storage for demonstration (in production, use database)
-saved_recipes = []
+saved_recipes = RecipeCatalog()
 recipe_id_counter = 1
 
 # Simple recipe model for testing
@@ -39,30 +40,14 @@ async def get_recipes(
     """Get recipes - simplified version using in-memory storage"""
     print(f"GET /recipes called with page={page}, size={size}, search={search}")
     
-    # Filter recipes based on search criteria
-    filtered_recipes = saved_recipes.copy()
+    # Filter and paginate using the catalog's indexes
+    paginated_recipes, total = saved_recipes.query(page, size, search, cuisine, difficulty)
     
-    if search:
-        filtered_recipes = [r for r in filtered_recipes if 
-                          search.lower() in r.get("title", "").lower() or 
-                          search.lower() in r.get("description", "").lower()]
-    
-    if cuisine:
-        filtered_recipes = [r for r in filtered_recipes if r.get("cuisine", "").lower() == cuisine.lower()]
-    
-    if difficulty:
-        filtered_recipes = [r for r in filtered_recipes if r.get("difficulty", "").lower() == difficulty.lower()]
-    
-    # Pagination
-    start = (page - 1) * size
-    end = start + size
-    paginated_recipes = filtered_recipes[start:end]
-    
-    print(f"Returning {len(paginated_recipes)} recipes out of {len(filtered_recipes)} total")
+    print(f"Returning {len(paginated_recipes)} recipes out of {total} total")
     
     return {
         "recipes": paginated_recipes,
-        "total": len(filtered_recipes),
+        "total": total,
         "page": page,
         "size": size
     }
@@ -103,7 +88,7 @@ async def create_recipe(recipe: SimpleRecipe):
     }
     
     # Save to in-memory storage
-    saved_recipes.append(recipe_data)
+    saved_recipes.add(recipe_data)
     recipe_id_counter += 1
     
     print(f"Recipe saved with ID {recipe_data['id']}. Total recipes: {len(saved_recipes)}")
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import List, Optional
 from datetime import datetime
 
@@ -31,19 +31,35 @@ class RecipeUpdate(BaseModel):
 
 class Recipe(RecipeBase):
     id: int
+    embedding_status: Optional[str] = Field(None, description="Semantic indexing state: pending, ready or failed")
     created_at: datetime
     updated_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
 
+class SimilarRecipe(Recipe):
+    score: float = Field(..., description="Similarity to the source recipe")
+
 class RecipeSearchResult(BaseModel):
     recipes: List[Recipe]
     total: int
     page: int
     size: int
 
+class FieldWeights(BaseModel):
+    title: float = Field(1.0, ge=0.0, description="Weight of title and description similarity")
+    ingredients: float = Field(1.0, ge=0.0, description="Weight of ingredient similarity")
+    instructions: float = Field(0.5, ge=0.0, description="Weight of instruction similarity")
+
+    @model_validator(mode="after")
+    def check_not_all_zero(self):
+        if self.title + self.ingredients + self.instructions <= 0:
+            raise ValueError("At least one field weight must be greater than zero")
+        return self
+
 class SemanticSearchRequest(BaseModel):
     query: str = Field(..., min_length=1, description="Search query for semantic search")
     limit: Optional[int] = Field(10, ge=1, le=100, description="Maximum number of results")
-    min_score: Optional[float] = Field(0.0, ge=0.0, le=1.0, description="Minimum similarity score")
\ No newline at end of file
+    min_score: Optional[float] = Field(0.0, ge=0.0, le=1.0, description="Minimum similarity score")
+    weights: FieldWeights = Field(default_factory=FieldWeights, description="Per-field weights for scoring")
\ No newline at end of file
@@ -0,0 +1,205 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import threading
+
+# Recipe fields that get their own embedding, in matrix order
+EMBEDDING_FIELDS = ("title", "ingredients", "instructions")
+
+
+def encode_vector(vector: np.ndarray) -> bytes:
+    """Serialize an embedding for a binary column"""
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def decode_vector(data: bytes) -> np.ndarray:
+    """Deserialize an embedding stored with encode_vector"""
+    return np.frombuffer(data, dtype=np.float32)
+
+
+class RecipeEmbeddingIndex:
+    """In-memory per-field embedding matrix for all recipes.
+
+    Vectors are stored L2-normalized in a single ``(fields, capacity, dim)``
+    float32 array, so weighted cosine scores for every recipe and every field
+    are computed with one matrix product per query.
+    """
+
+    def __init__(self, dim: int, initial_capacity: int = 1024):
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._matrix = np.zeros((len(EMBEDDING_FIELDS), initial_capacity, dim), dtype=np.float32)
+        self._ids = np.zeros(initial_capacity, dtype=np.int64)
+        self._positions: Dict[int, int] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def ids(self) -> np.ndarray:
+        """Return the ids of all indexed recipes"""
+        with self._lock:
+            return self._ids[:self._size].copy()
+
+    def load(self, items: Iterable[Tuple[int, Dict[str, np.ndarray]]]):
+        """Replace the index contents with (recipe_id, field vectors) pairs"""
+        items = list(items)
+        with self._lock:
+            capacity = max(len(items), 1)
+            self._matrix = np.zeros((len(EMBEDDING_FIELDS), capacity, self.dim), dtype=np.float32)
+            self._ids = np.zeros(capacity, dtype=np.int64)
+            self._positions = {}
+            self._size = 0
+            for recipe_id, vectors in items:
+                self._upsert_locked(recipe_id, vectors)
+
+    def upsert(self, recipe_id: int, vectors: Dict[str, np.ndarray]):
+        """Insert or replace the field vectors of a recipe"""
+        with self._lock:
+            self._upsert_locked(recipe_id, vectors)
+
+    def remove(self, recipe_id: int):
+        """Remove a recipe by moving the last row into its slot"""
+        with self._lock:
+            position = self._positions.pop(recipe_id, None)
+            if position is None:
+                return
+            last = self._size - 1
+            if position != last:
+                moved_id = int(self._ids[last])
+                self._matrix[:, position] = self._matrix[:, last]
+                self._ids[position] = moved_id
+                self._positions[moved_id] = position
+            self._size = last
+
+    def search(self, query_vector: np.ndarray, weights: Dict[str, float], top_k: int) -> Tuple[List[int], List[float]]:
+        """Return the top_k recipe ids and weighted cosine scores for a query"""
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+        field_weights = self._field_weights(weights)
+
+        with self._lock:
+            size = self._size
+            if size == 0:
+                return [], []
+            # (fields, size) per-field cosine similarities, folded by the weights
+            scores = field_weights @ (self._matrix[:, :size] @ query)
+            ids = self._ids[:size].copy()
+
+        top_k = min(top_k, size)
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [int(i) for i in ids[top]], [float(s) for s in scores[top]]
+
+    def similarities(self, recipe_id: int, weights: Dict[str, float]) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Return all indexed ids and their weighted similarity to one recipe (itself scored -inf)"""
+        field_weights = self._field_weights(weights)
+        with self._lock:
+            position = self._positions.get(recipe_id)
+            if position is None:
+                return None
+            size = self._size
+            scores = np.zeros(size, dtype=np.float32)
+            for field_index in range(len(EMBEDDING_FIELDS)):
+                field_matrix = self._matrix[field_index, :size]
+                scores += field_weights[field_index] * (field_matrix @ field_matrix[position])
+            ids = self._ids[:size].copy()
+        scores[position] = -np.inf
+        return ids, scores
+
+    def nearest_neighbors(
+        self,
+        recipe_ids: List[int],
+        weights: Dict[str, float],
+        k: int,
+        block_size: int = 1024
+    ) -> List[Tuple[List[int], List[float]]]:
+        """Return the k most similar other recipes for each of recipe_ids.
+
+        Similarity is the weighted per-field cosine used by search. Scores are
+        computed in ``block_size`` x ``block_size`` tiles that are merged into a
+        running top-k, so memory stays bounded however large the index is.
+        Recipes that are not indexed get empty lists.
+        """
+        field_weights = self._field_weights(weights)
+        results: List[Tuple[List[int], List[float]]] = [([], [])] * len(recipe_ids)
+        if k <= 0:
+            return results
+
+        for block_start in range(0, len(recipe_ids), block_size):
+            block = recipe_ids[block_start:block_start + block_size]
+            with self._lock:
+                rows = [(i, self._positions.get(recipe_id)) for i, recipe_id in enumerate(block)]
+                rows = [(i, position) for i, position in rows if position is not None]
+                if not rows:
+                    continue
+                positions = np.array([position for _, position in rows], dtype=np.int64)
+                query_ids = self._ids[positions]
+                queries = self._matrix[:, positions] * field_weights[:, None, None]
+
+            best_scores = np.empty((len(rows), 0), dtype=np.float32)
+            best_ids = np.empty((len(rows), 0), dtype=np.int64)
+            column_start = 0
+            while True:
+                # Only copying a tile happens under the lock, so upserts can run
+                # between tiles instead of waiting for the whole block
+                with self._lock:
+                    size = self._size
+                    if column_start >= size:
+                        break
+                    column_end = min(column_start + block_size, size)
+                    tile = self._matrix[:, column_start:column_end].copy()
+                    tile_ids = self._ids[column_start:column_end].copy()
+                column_start = column_end
+
+                # (fields, rows, columns) summed over fields
+                scores = (queries @ tile.transpose(0, 2, 1)).sum(axis=0)
+                scores[query_ids[:, None] == tile_ids[None, :]] = -np.inf
+
+                best_scores = np.concatenate([best_scores, scores], axis=1)
+                best_ids = np.concatenate([best_ids, np.broadcast_to(tile_ids, scores.shape)], axis=1)
+                if best_scores.shape[1] > k:
+                    keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                    best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                    best_ids = np.take_along_axis(best_ids, keep, axis=1)
+
+            order = np.argsort(-best_scores, axis=1, kind="stable")
+            best_scores = np.take_along_axis(best_scores, order, axis=1)
+            best_ids = np.take_along_axis(best_ids, order, axis=1)
+            for row, (i, _) in enumerate(rows):
+                # Drop the recipe itself when the index has k or fewer others
+                found = np.isfinite(best_scores[row])
+                results[block_start + i] = (best_ids[row][found].tolist(), best_scores[row][found].tolist())
+
+        return results
+
+    def _field_weights(self, weights: Dict[str, float]) -> np.ndarray:
+        field_weights = np.array([weights.get(field, 0.0) for field in EMBEDDING_FIELDS], dtype=np.float32)
+        total = field_weights.sum()
+        if total > 0:
+            field_weights /= total
+        return field_weights
+
+    def _upsert_locked(self, recipe_id: int, vectors: Dict[str, np.ndarray]):
+        position = self._positions.get(recipe_id)
+        if position is None:
+            if self._size == self._ids.shape[0]:
+                self._grow()
+            position = self._size
+            self._size += 1
+            self._positions[recipe_id] = position
+            self._ids[position] = recipe_id
+        for field_index, field in enumerate(EMBEDDING_FIELDS):
+            vector = np.asarray(vectors[field], dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            self._matrix[field_index, position] = vector / norm if norm > 0 else vector
+
+    def _grow(self):
+        capacity = max(self._ids.shape[0] * 2, 1)
+        matrix = np.zeros((len(EMBEDDING_FIELDS), capacity, self.dim), dtype=np.float32)
+        matrix[:, :self._size] = self._matrix[:, :self._size]
+        ids = np.zeros(capacity, dtype=np.int64)
+        ids[:self._size] = self._ids[:self._size]
+        self._matrix = matrix
+        self._ids = ids
@@ -0,0 +1,281 @@
+from typing import List, Optional
+from app.config import settings
+from app.database import database
+from app.services.embedding_index import EMBEDDING_FIELDS, encode_vector
+from app.services.inference_executor import InferenceOverloaded, InferenceTimeout
+from app.services.neighbor_service import NeighborService
+from app.services.semantic_search_service import SemanticSearchService, build_field_texts
+import asyncio
+import json
+
+class EmbeddingQueue:
+    """Durable queue of embedding jobs stored in the ``embedding_jobs`` table"""
+
+    _wakeup: Optional[asyncio.Event] = None
+
+    @classmethod
+    def wakeup_event(cls) -> asyncio.Event:
+        """Event set when work is enqueued, so idle workers do not wait for the next poll"""
+        if cls._wakeup is None:
+            cls._wakeup = asyncio.Event()
+        return cls._wakeup
+
+    @classmethod
+    def notify(cls):
+        """Wake idle workers; call after the transaction that enqueued jobs has committed"""
+        cls.wakeup_event().set()
+
+    async def enqueue(self, recipe_id: int):
+        """Queue a recipe for embedding; call inside the transaction that writes the recipe"""
+        # The partial unique index keeps one queued job per recipe, even for concurrent writes
+        query = """
+        INSERT INTO embedding_jobs (recipe_id)
+        VALUES (:recipe_id)
+        ON CONFLICT (recipe_id) WHERE status = 'queued' DO NOTHING
+        """
+        await database.execute(query=query, values={"recipe_id": recipe_id})
+
+    async def claim(self, batch_size: int):
+        """Lock up to batch_size due jobs, including jobs abandoned by a crashed worker.
+
+        Reclaiming an expired lease counts the abandoned run as an attempt, so a
+        recipe that keeps killing its worker eventually fails instead of looping.
+        """
+        query = """
+        UPDATE embedding_jobs
+        SET status = 'running', locked_at = NOW(),
+            attempts = attempts + CASE WHEN status = 'running' THEN 1 ELSE 0 END
+        WHERE id IN (
+            SELECT id FROM embedding_jobs
+            WHERE (status = 'queued' AND available_at <= NOW())
+               OR (status = 'running' AND locked_at < NOW() - :lease_seconds * INTERVAL '1 second')
+            ORDER BY available_at
+            LIMIT :batch_size
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING id, recipe_id, attempts
+        """
+        return await database.fetch_all(
+            query=query,
+            values={"batch_size": batch_size, "lease_seconds": settings.embedding_lease_seconds}
+        )
+
+    async def complete(self, job_id: int):
+        """Remove a finished job"""
+        await database.execute(query="DELETE FROM embedding_jobs WHERE id = :job_id", values={"job_id": job_id})
+
+    async def release(self, job_id: int, delay: float = 0):
+        """Put a claimed job back in the queue without counting an attempt"""
+        await self._requeue(job_id, delay)
+
+    async def _requeue(self, job_id: int, delay: float, attempts: Optional[int] = None, error: Optional[str] = None):
+        """Queue a claimed job again, unless the recipe was queued again meanwhile.
+
+        The claimed job is replaced by a queued copy in one statement, so a
+        queued job enqueued while this one ran wins over the partial unique index
+        instead of raising.
+        """
+        await database.execute(
+            query="""
+            WITH claimed AS (
+                DELETE FROM embedding_jobs WHERE id = :job_id
+                RETURNING recipe_id, attempts, last_error
+            )
+            INSERT INTO embedding_jobs (recipe_id, attempts, last_error, available_at)
+            SELECT recipe_id, COALESCE(CAST(:attempts AS INTEGER), attempts),
+                   COALESCE(CAST(:error AS TEXT), last_error), NOW() + :delay * INTERVAL '1 second'
+            FROM claimed
+            ON CONFLICT (recipe_id) WHERE status = 'queued' DO NOTHING
+            """,
+            values={"job_id": job_id, "delay": delay, "attempts": attempts, "error": error}
+        )
+
+    async def fail(self, job, error: str):
+        """Reschedule a job with exponential backoff, or give up after the last attempt"""
+        attempts = job["attempts"] + 1
+        if attempts >= settings.embedding_max_attempts:
+            await self.give_up(job, error, attempts)
+            return
+
+        delay = min(
+            settings.embedding_retry_base_seconds * 2 ** (attempts - 1),
+            settings.embedding_retry_max_seconds
+        )
+        await self._requeue(job["id"], delay, attempts, error)
+
+    async def give_up(self, job, error: str, attempts: Optional[int] = None):
+        """Mark a job and its recipe as failed; ``attempts`` defaults to the job's count"""
+        if attempts is None:
+            attempts = job["attempts"]
+        async with database.transaction():
+            await database.execute(
+                query="""
+                UPDATE embedding_jobs
+                SET status = 'failed', attempts = :attempts, last_error = :error, locked_at = NULL
+                WHERE id = :job_id
+                """,
+                values={"job_id": job["id"], "attempts": attempts, "error": error}
+            )
+            await database.execute(
+                query="UPDATE recipes SET embedding_status = 'failed' WHERE id = :recipe_id",
+                values={"recipe_id": job["recipe_id"]}
+            )
+
+
+class EmbeddingWorkerPool:
+    """In-process workers that drain the embedding queue in batches"""
+
+    _tasks: List[asyncio.Task] = []
+
+    def __init__(self):
+        self.queue = EmbeddingQueue()
+        self.semantic_service = SemanticSearchService()
+        self.neighbor_service = NeighborService()
+
+    @classmethod
+    def start(cls, workers: int):
+        """Start the worker tasks on the running event loop"""
+        if cls._tasks:
+            return
+        pool = cls()
+        loop = asyncio.get_running_loop()
+        cls._tasks = [loop.create_task(pool._run(worker_id)) for worker_id in range(workers)]
+
+    @classmethod
+    async def stop(cls):
+        """Cancel the worker tasks; jobs they held are reclaimed after the lease expires"""
+        tasks, cls._tasks = cls._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, worker_id: int):
+        wakeup = EmbeddingQueue.wakeup_event()
+        while True:
+            # Clear before claiming so an enqueue during the claim is not missed
+            wakeup.clear()
+            try:
+                jobs = await self.queue.claim(settings.embedding_batch_size)
+            except Exception as e:
+                print(f"Embedding worker {worker_id} failed to claim jobs: {e}")
+                jobs = []
+
+            if not jobs:
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=settings.embedding_poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self.process_batch(jobs)
+
+    async def process_batch(self, jobs):
+        """Embed the recipes of a batch of claimed jobs together"""
+        # Reclaimed leases count as attempts, so a job can arrive already exhausted
+        exhausted = [job for job in jobs if job["attempts"] >= settings.embedding_max_attempts]
+        for job in exhausted:
+            print(f"Giving up on embedding recipe {job['recipe_id']} after {job['attempts']} attempts")
+            try:
+                await self.queue.give_up(job, "Worker lease expired on the last attempt")
+            except Exception as e:
+                print(f"Error failing embedding job {job['id']}: {e}")
+        jobs = [job for job in jobs if job["attempts"] < settings.embedding_max_attempts]
+        if not jobs:
+            return
+
+        recipe_ids = [job["recipe_id"] for job in jobs]
+        try:
+            rows = await database.fetch_all(
+                query="""
+                SELECT id, title, description, ingredients, instructions, content_version
+                FROM recipes WHERE id = ANY(:recipe_ids)
+                """,
+                values={"recipe_ids": recipe_ids}
+            )
+            recipes = {row["id"]: row for row in rows}
+            present = [recipe_id for recipe_id in dict.fromkeys(recipe_ids) if recipe_id in recipes]
+            vectors = [] if not present else await self.semantic_service.encode_field_texts([
+                build_field_texts(
+                    recipes[recipe_id]["title"],
+                    recipes[recipe_id]["description"],
+                    json.loads(recipes[recipe_id]["ingredients"]) if recipes[recipe_id]["ingredients"] else [],
+                    recipes[recipe_id]["instructions"]
+                )
+                for recipe_id in present
+            ])
+        except InferenceOverloaded as e:
+            # The inference pool is busy serving searches; that says nothing about
+            # these recipes, so retry later without using up their attempts
+            print(f"Inference busy, deferring recipes {recipe_ids}: {e}")
+            for job in jobs:
+                await self._release_quietly(job, settings.embedding_retry_base_seconds)
+            return
+        except InferenceTimeout as e:
+            if len(jobs) > 1:
+                # Split the batch so one oversized recipe cannot keep timing out the others
+                middle = len(jobs) // 2
+                await self.process_batch(jobs[:middle])
+                await self.process_batch(jobs[middle:])
+                return
+            print(f"Error embedding recipes {recipe_ids}: {e}")
+            for job in jobs:
+                await self._fail_quietly(job, str(e))
+            return
+        except Exception as e:
+            print(f"Error embedding recipes {recipe_ids}: {e}")
+            for job in jobs:
+                await self._fail_quietly(job, str(e))
+            return
+
+        vectors_by_id = dict(zip(present, vectors))
+        for job in jobs:
+            recipe_id = job["recipe_id"]
+            try:
+                recipe_vectors = vectors_by_id.get(recipe_id)
+                stored = False
+                async with database.transaction():
+                    if recipe_vectors is None:
+                        # The recipe was deleted
+                        await self.queue.complete(job["id"])
+                    elif await self._store(recipes[recipe_id], recipe_vectors):
+                        stored = True
+                        await self.queue.complete(job["id"])
+                    else:
+                        # Content changed after it was read; the update that changed it
+                        # queued its own job, so this one is done
+                        await self.queue.complete(job["id"])
+                if stored:
+                    SemanticSearchService.index_recipe(recipe_id, recipe_vectors)
+                    # Neighbor refreshes are serialized; do not hold up the next batch for them
+                    NeighborService.schedule(self.neighbor_service.refresh_recipe(recipe_id))
+            except Exception as e:
+                print(f"Error storing embeddings for recipe {recipe_id}: {e}")
+                await self._fail_quietly(job, str(e))
+
+    async def _store(self, recipe, vectors) -> bool:
+        """Save embeddings unless the recipe content changed after it was read"""
+        assignments = ", ".join(f"{field}_embedding = :{field}_embedding" for field in EMBEDDING_FIELDS)
+        values = {f"{field}_embedding": encode_vector(vectors[field]) for field in EMBEDDING_FIELDS}
+        values.update({"recipe_id": recipe["id"], "content_version": recipe["content_version"]})
+        result = await database.fetch_one(
+            query=f"""
+            UPDATE recipes
+            SET {assignments}, embedding_status = 'ready'
+            WHERE id = :recipe_id AND content_version = :content_version
+            RETURNING id
+            """,
+            values=values
+        )
+        return result is not None
+
+    async def _release_quietly(self, job, delay: float):
+        try:
+            await self.queue.release(job["id"], delay)
+        except Exception as e:
+            print(f"Error rescheduling embedding job {job['id']}: {e}")
+
+    async def _fail_quietly(self, job, error: str):
+        try:
+            await self.queue.fail(job, error)
+        except Exception as e:
+            print(f"Error rescheduling embedding job {job['id']}: {e}")
@@ -0,0 +1,192 @@
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional
+import numpy as np
+from app.config import settings
+import asyncio
+import multiprocessing
+import os
+import threading
+
+try:
+    import psutil
+except ImportError:  # optional, only used to count physical cores
+    psutil = None
+
+class InferenceOverloaded(Exception):
+    """Raised when the inference executor has no capacity left for a request"""
+
+class InferenceTimeout(Exception):
+    """Raised when a model call does not finish within the request timeout"""
+
+# Model instance of the current process (the API process in thread mode,
+# each worker process in process mode)
+_model = None
+_model_lock = threading.Lock()
+
+def physical_cores() -> int:
+    """Number of physical CPU cores, falling back to the logical count"""
+    if psutil is not None:
+        cores = psutil.cpu_count(logical=False)
+        if cores:
+            return cores
+    return os.cpu_count() or 1
+
+def _init_worker(model_name: str, torch_threads: int):
+    """Limit torch intra-op threads and load the model before the first request"""
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+    _get_model(model_name)
+
+def _get_model(model_name: str):
+    """Get the sentence transformer model of this process (singleton pattern)"""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from sentence_transformers import SentenceTransformer
+                _model = SentenceTransformer(model_name)
+    return _model
+
+def _encode(model_name: str, texts: List[str]) -> np.ndarray:
+    """Encode texts with the process-local model (runs inside the executor)"""
+    return _get_model(model_name).encode(texts, convert_to_tensor=False)
+
+class InferenceExecutor:
+    """Bounded executor for CPU-bound model inference.
+
+    Model calls run on a dedicated thread or process pool instead of the event
+    loop's default executor. At most ``workers`` calls run at once; up to
+    ``max_queue`` more wait for a slot for at most ``queue_timeout`` seconds, and
+    anything beyond that is rejected with InferenceOverloaded. Each call is
+    bounded by ``timeout`` seconds.
+    """
+
+    def __init__(
+        self,
+        mode: str = "thread",
+        workers: int = 0,
+        torch_threads: int = 0,
+        max_queue: int = 32,
+        queue_timeout: float = 1.0,
+        timeout: float = 10.0,
+        model_name: str = "all-MiniLM-L6-v2"
+    ):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Unknown inference mode: {mode}")
+        cores = physical_cores()
+        self.mode = mode
+        self.workers = workers or cores
+        self.torch_threads = torch_threads or max(1, cores // self.workers)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.timeout = timeout
+        self.model_name = model_name
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            # The initializer loads the model inside the pool, never on the event loop
+            initargs = (self.model_name, self.torch_threads)
+            if self.mode == "process":
+                # spawn avoids forking a process that already holds torch threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=initargs
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="inference",
+                    initializer=_init_worker,
+                    initargs=initargs
+                )
+        return self._executor
+
+    def _release_slot(self, loop: asyncio.AbstractEventLoop):
+        """Return a slot from a pool thread; the loop may have closed while the call ran"""
+        if loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(self._slots.release)
+        except RuntimeError:
+            # Closed between the check and the call
+            pass
+
+    async def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts on the inference pool, subject to admission control and timeouts"""
+        loop = asyncio.get_running_loop()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+
+        if self._slots.locked():
+            if self._waiting >= self.max_queue:
+                raise InferenceOverloaded("Inference queue is full")
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                raise InferenceOverloaded("Timed out waiting for an inference slot")
+            finally:
+                self._waiting -= 1
+        else:
+            await self._slots.acquire()
+
+        executor = None
+        try:
+            executor = self._get_executor()
+            future = executor.submit(_encode, self.model_name, texts)
+        except BaseException as e:
+            self._slots.release()
+            if isinstance(e, BrokenExecutor):
+                self._discard(executor)
+            raise
+        # Free the slot when the model call really finishes, not when the caller
+        # gives up, so a timed-out call still counts against the bound
+        future.add_done_callback(lambda _: self._release_slot(loop))
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            raise InferenceTimeout(f"Inference did not finish within {self.timeout} seconds")
+        except BrokenExecutor:
+            # The model failed to load or a worker died; start a fresh pool next time
+            self._discard(executor)
+            raise
+
+    def _discard(self, executor: Optional[Executor]):
+        if executor is not None and self._executor is executor:
+            self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        """Stop the pool; queued calls are cancelled"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+_executor: Optional[InferenceExecutor] = None
+_executor_lock = threading.Lock()
+
+def get_inference_executor() -> InferenceExecutor:
+    """Get the process-wide inference executor configured from settings"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = InferenceExecutor(
+                    mode=settings.inference_mode,
+                    workers=settings.inference_workers,
+                    torch_threads=settings.inference_torch_threads,
+                    max_queue=settings.inference_max_queue,
+                    queue_timeout=settings.inference_queue_timeout_seconds,
+                    timeout=settings.inference_timeout_seconds,
+                    model_name=settings.embedding_model
+                )
+    return _executor
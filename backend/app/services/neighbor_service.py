@@ -0,0 +1,186 @@
+from typing import Iterable, List
+import numpy as np
+from app.config import settings
+from app.database import database
+from app.schemas.recipe import SimilarRecipe
+from app.services.semantic_search_service import DEFAULT_FIELD_WEIGHTS, SemanticSearchService
+import asyncio
+import json
+
+# Advisory lock key shared by every process that writes recipe_neighbors
+NEIGHBOR_LOCK_KEY = 7_310_104
+
+class NeighborService:
+    """Maintains the precomputed "similar recipes" lists in ``recipe_neighbors``"""
+
+    # Serializes rebuilds and refreshes within this process; _recompute also takes
+    # NEIGHBOR_LOCK_KEY so writes from other processes (rebuild_neighbors.py) wait too
+    _refresh_lock = asyncio.Lock()
+    _background_tasks = set()
+
+    def __init__(self):
+        self.semantic_service = SemanticSearchService()
+
+    @classmethod
+    def schedule(cls, coroutine):
+        """Run a neighbor refresh in the background so writes do not wait for it"""
+        task = asyncio.get_running_loop().create_task(coroutine)
+        # Keep a reference until the task finishes so it is not garbage collected
+        cls._background_tasks.add(task)
+        task.add_done_callback(cls._background_tasks.discard)
+        return task
+
+    async def get_similar(self, recipe_id: int, limit: int = 10) -> List[SimilarRecipe]:
+        """Get the precomputed most similar recipes for a recipe"""
+        query = """
+        SELECT r.id, r.title, r.description, r.ingredients, r.instructions, r.prep_time, r.cook_time,
+               r.servings, r.difficulty, r.cuisine, r.tags, r.embedding_status, r.created_at,
+               r.updated_at, n.score
+        FROM recipe_neighbors n
+        JOIN recipes r ON r.id = n.neighbor_id
+        WHERE n.recipe_id = :recipe_id
+        ORDER BY n.rank
+        LIMIT :limit
+        """
+        rows = await database.fetch_all(query=query, values={"recipe_id": recipe_id, "limit": limit})
+        return [self._row_to_similar_recipe(row) for row in rows]
+
+    async def rebuild_all(self) -> int:
+        """Recompute the neighbor lists of every indexed recipe"""
+        async with self._refresh_lock:
+            index = await self.semantic_service.get_index()
+            recipe_ids = sorted(index.ids().tolist())
+            block_size = settings.neighbor_block_size
+            for start in range(0, len(recipe_ids), block_size):
+                await self._recompute(index, recipe_ids[start:start + block_size])
+            return len(recipe_ids)
+
+    async def refresh_recipe(self, recipe_id: int):
+        """Update neighbor lists after a recipe was created or its content changed"""
+        try:
+            async with self._refresh_lock:
+                index = await self.semantic_service.get_index()
+                affected = {recipe_id}
+                # Lists that hold this recipe carry a stale score
+                affected.update(await self.referencing(recipe_id))
+
+                loop = asyncio.get_event_loop()
+                scored = await loop.run_in_executor(
+                    None, lambda: index.similarities(recipe_id, DEFAULT_FIELD_WEIGHTS)
+                )
+                if scored is not None:
+                    ids, scores = scored
+                    affected.update(await self._lists_to_enter(ids, scores))
+
+                await self._recompute(index, sorted(affected))
+        except Exception as e:
+            print(f"Error refreshing neighbors for recipe {recipe_id}: {e}")
+
+    async def refresh_recipes(self, recipe_ids: Iterable[int]):
+        """Recompute the lists of specific recipes, e.g. those that listed a deleted recipe"""
+        try:
+            async with self._refresh_lock:
+                index = await self.semantic_service.get_index()
+                await self._recompute(index, sorted(set(recipe_ids)))
+        except Exception as e:
+            print(f"Error refreshing neighbors: {e}")
+
+    async def referencing(self, recipe_id: int) -> List[int]:
+        """Ids of recipes whose neighbor list contains recipe_id"""
+        rows = await database.fetch_all(
+            query="SELECT recipe_id FROM recipe_neighbors WHERE neighbor_id = :recipe_id",
+            values={"recipe_id": recipe_id}
+        )
+        return [row["recipe_id"] for row in rows]
+
+    async def _lists_to_enter(self, ids: np.ndarray, scores: np.ndarray) -> List[int]:
+        """Ids of recipes whose list the scored recipe now belongs in"""
+        k = settings.neighbor_count
+        if len(ids) <= k + 1:
+            # Lists are not full yet, so every recipe gains a neighbor
+            return ids.tolist()
+
+        # Only recipes scoring above the lowest last-ranked score can enter any list
+        row = await database.fetch_one(
+            query="SELECT MIN(score) AS score FROM recipe_neighbors WHERE rank = :last_rank",
+            values={"last_rank": k - 1}
+        )
+        if row is None or row["score"] is None:
+            return []
+        candidates = scores > row["score"]
+        if not candidates.any():
+            return []
+
+        # Compare each candidate against its own list's last entry
+        rows = await database.fetch_all(
+            query="""
+            SELECT n.recipe_id
+            FROM recipe_neighbors n
+            JOIN unnest(CAST(:recipe_ids AS INTEGER[]), CAST(:scores AS DOUBLE PRECISION[])) AS c(recipe_id, score)
+              ON c.recipe_id = n.recipe_id
+            WHERE n.rank = :last_rank AND n.score < c.score
+            """,
+            values={
+                "recipe_ids": ids[candidates].tolist(),
+                "scores": scores[candidates].astype(np.float64).tolist(),
+                "last_rank": k - 1
+            }
+        )
+        return [row["recipe_id"] for row in rows]
+
+    async def _recompute(self, index, recipe_ids: List[int]):
+        """Recompute and replace the neighbor lists of recipe_ids"""
+        if not recipe_ids:
+            return
+        loop = asyncio.get_event_loop()
+        lists = await loop.run_in_executor(
+            None,
+            lambda: index.nearest_neighbors(
+                recipe_ids, DEFAULT_FIELD_WEIGHTS, settings.neighbor_count, settings.neighbor_block_size
+            )
+        )
+
+        values = [
+            {"recipe_id": recipe_id, "rank": rank, "neighbor_id": neighbor_id, "score": score}
+            for recipe_id, (neighbor_ids, scores) in zip(recipe_ids, lists)
+            for rank, (neighbor_id, score) in enumerate(zip(neighbor_ids, scores))
+        ]
+
+        async with database.transaction():
+            # Held until commit, so a concurrent writer cannot insert between our delete and insert
+            await database.execute(query="SELECT pg_advisory_xact_lock(:key)", values={"key": NEIGHBOR_LOCK_KEY})
+            await database.execute(
+                query="DELETE FROM recipe_neighbors WHERE recipe_id = ANY(:recipe_ids)",
+                values={"recipe_ids": list(recipe_ids)}
+            )
+            if values:
+                # Skip rows for recipes deleted since the index snapshot
+                await database.execute_many(
+                    query="""
+                    INSERT INTO recipe_neighbors (recipe_id, rank, neighbor_id, score)
+                    SELECT :recipe_id, :rank, :neighbor_id, :score
+                    WHERE EXISTS (SELECT 1 FROM recipes WHERE id = :recipe_id)
+                      AND EXISTS (SELECT 1 FROM recipes WHERE id = :neighbor_id)
+                    """,
+                    values=values
+                )
+
+    def _row_to_similar_recipe(self, row) -> SimilarRecipe:
+        """Convert a joined neighbor row to a SimilarRecipe"""
+        return SimilarRecipe(
+            id=row["id"],
+            title=row["title"],
+            description=row["description"],
+            ingredients=json.loads(row["ingredients"]) if row["ingredients"] else [],
+            instructions=row["instructions"],
+            prep_time=row["prep_time"],
+            cook_time=row["cook_time"],
+            servings=row["servings"],
+            difficulty=row["difficulty"],
+            cuisine=row["cuisine"],
+            tags=json.loads(row["tags"]) if row["tags"] else [],
+            embedding_status=row["embedding_status"],
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+            score=row["score"]
+        )
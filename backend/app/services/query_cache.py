@@ -0,0 +1,124 @@
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+import numpy as np
+import asyncio
+import threading
+
+
+class SemanticQueryCache:
+    """Two-level cache for semantic search results.
+
+    The first level maps a normalized query string to its embedding so repeated
+    queries skip the model. The second level keeps a small matrix of recent query
+    vectors together with their top-k recipe ids, so a query whose embedding is
+    within ``threshold`` cosine similarity of a cached one (and searched with the
+    same ``scope``, e.g. field weights) reuses that ranking instead of running a
+    new similarity pass. A ranking cut at top-k only serves limits up to k.
+    """
+
+    def __init__(self, max_entries: int = 256, threshold: float = 0.95, dim: int = 384):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._embeddings: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        # Second level: row i of _vectors belongs to _results[i]
+        self._vectors = np.zeros((max_entries, dim), dtype=np.float32)
+        self._results: List[Optional[Tuple[List[int], List[float]]]] = [None] * max_entries
+        self._scopes: List[Hashable] = [None] * max_entries
+        # Ranking length each entry was searched with; -1 when the ranking is
+        # complete (shorter than requested), so it serves any limit
+        self._top_ks = np.zeros(max_entries, dtype=np.int64)
+        self._used = np.zeros(max_entries, dtype=bool)
+        self._next_slot = 0
+        # Bumped on every invalidation so in-flight searches started against an
+        # older recipe set do not store stale rankings
+        self.generation = 0
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Normalize query text for exact-match lookups"""
+        return " ".join(query.lower().split())
+
+    def get_embedding(self, key: str) -> Optional[np.ndarray]:
+        """Return a cached query embedding for a normalized query"""
+        with self._lock:
+            embedding = self._embeddings.get(key)
+            if embedding is not None:
+                self._embeddings.move_to_end(key)
+            return embedding
+
+    def put_embedding(self, key: str, embedding: np.ndarray):
+        """Cache a query embedding (the embedding only depends on the model)"""
+        with self._lock:
+            self._embeddings[key] = embedding
+            self._embeddings.move_to_end(key)
+            while len(self._embeddings) > self.max_entries:
+                self._embeddings.popitem(last=False)
+
+    def lookup(self, vector: np.ndarray, limit: int, scope: Hashable = None) -> Optional[Tuple[List[int], List[float]]]:
+        """Return cached (ids, scores) for the nearest cached query vector whose ranking covers ``limit``, if close enough"""
+        unit = self._normalize(vector)
+        with self._lock:
+            candidates = self._used & np.fromiter(
+                (s == scope for s in self._scopes), dtype=bool, count=self.max_entries
+            )
+            candidates &= (self._top_ks < 0) | (self._top_ks >= limit)
+            if not candidates.any():
+                return None
+            similarities = self._vectors @ unit
+            similarities[~candidates] = -1.0
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                return None
+            return self._results[best]
+
+    def store(self, vector: np.ndarray, ids: List[int], scores: List[float], top_k: int, generation: int, scope: Hashable = None):
+        """Remember the ranking a search for the ``top_k`` best recipes returned for a query vector"""
+        unit = self._normalize(vector)
+        with self._lock:
+            if generation != self.generation:
+                return
+            slot = self._next_slot
+            self._vectors[slot] = unit
+            self._results[slot] = (ids, scores)
+            self._scopes[slot] = scope
+            self._top_ks[slot] = top_k if len(ids) >= top_k else -1
+            self._used[slot] = True
+            self._next_slot = (slot + 1) % self.max_entries
+
+    def invalidate(self):
+        """Drop all cached rankings (recipes changed); query embeddings stay valid"""
+        with self._lock:
+            self._used[:] = False
+            self._results = [None] * self.max_entries
+            self._scopes = [None] * self.max_entries
+            self._next_slot = 0
+            self.generation += 1
+
+    async def coalesce(self, key: str, factory):
+        """Run ``factory()`` once for concurrent callers sharing the same key.
+
+        The work runs in its own task, so a caller that is cancelled (including
+        the one that started it) does not cancel the result for the others.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish_inflight(key, done))
+        return await asyncio.shield(task)
+
+    def _finish_inflight(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved in case every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def _normalize(self, vector: np.ndarray) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        if vector.shape[0] != self._vectors.shape[1]:
+            raise ValueError(f"Expected query vector of size {self._vectors.shape[1]}, got {vector.shape[0]}")
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
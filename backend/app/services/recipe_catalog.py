@@ -0,0 +1,306 @@
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import sys
+
+# Sentinel for missing integers in the int32 columns
+_MISSING_INT = -(2 ** 31)
+_MAX_INT = 2 ** 31 - 1
+# Offsets are 4-byte, so every buffer is limited to 4 GiB
+_MAX_OFFSET = 0xFFFFFFFF
+# Separators in the search buffer: between title and description, and after each row
+_FIELD_SEPARATOR = "\0"
+_ROW_SEPARATOR = "\1"
+
+def _encode(value: str) -> bytes:
+    if not isinstance(value, str):
+        raise TypeError(f"Expected a string, got {type(value).__name__}")
+    return value.encode("utf-8", "surrogatepass")
+
+def _check_offset(size: int):
+    if size > _MAX_OFFSET:
+        raise OverflowError("Catalog column is full")
+
+class _TextColumn:
+    """Column of strings stored as UTF-8 in one buffer, with row offsets"""
+
+    def __init__(self, nullable: bool = False):
+        self._data = bytearray()
+        self._offsets = array("I", [0])
+        self._nulls: Optional[bytearray] = bytearray() if nullable else None
+
+    def encode(self, value: Optional[str]) -> Optional[bytes]:
+        """Validate and encode a value before any column is modified"""
+        if value is None:
+            if self._nulls is None:
+                raise TypeError("This column does not accept None")
+            return None
+        encoded = _encode(value)
+        _check_offset(len(self._data) + len(encoded))
+        return encoded
+
+    def append(self, encoded: Optional[bytes]):
+        if encoded is not None:
+            self._data += encoded
+        self._offsets.append(len(self._data))
+        if self._nulls is not None:
+            self._nulls.append(encoded is None)
+
+    def value(self, position: int) -> Optional[str]:
+        if self._nulls is not None and self._nulls[position]:
+            return None
+        return self._data[self._offsets[position]:self._offsets[position + 1]].decode("utf-8", "surrogatepass")
+
+class _InternedColumn:
+    """Column of repeated strings stored as integer codes.
+
+    Each distinct value is kept once and rows store a 4-byte code. A secondary
+    index maps the lowercased value to the ascending row positions that hold
+    it, for case-insensitive equality filters.
+    """
+
+    def __init__(self):
+        self.values: List[Optional[str]] = []
+        self._codes: Dict[Optional[str], int] = {}
+        self.codes = array("I")
+        self._index: Dict[str, array] = {}
+
+    def check(self, value: Optional[str]):
+        """Raise if ``value`` cannot be appended, before any column is modified"""
+        if value is not None and not isinstance(value, str):
+            raise TypeError(f"Expected a string or None, got {type(value).__name__}")
+        if value not in self._codes and len(self.values) > 0xFFFFFFFF:
+            raise OverflowError("Too many distinct values for an interned column")
+
+    def append(self, value: Optional[str]):
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(sys.intern(value) if value is not None else None)
+            self._codes[value] = code
+        position = len(self.codes)
+        self.codes.append(code)
+        self._index.setdefault((value or "").lower(), array("I")).append(position)
+
+    def value(self, position: int) -> Optional[str]:
+        return self.values[self.codes[position]]
+
+    def rows(self, value: str) -> array:
+        """Ascending positions whose value equals ``value`` case-insensitively"""
+        return self._index.get(value.lower(), array("I"))
+
+class _InternedListColumn:
+    """Column of string lists; items are interned codes in one flat array with row offsets"""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+        self._items = array("I")
+        self._offsets = array("I", [0])
+
+    def check(self, values: Tuple[str, ...]):
+        """Raise if ``values`` cannot be appended, before any column is modified"""
+        for value in values:
+            if not isinstance(value, str):
+                raise TypeError(f"Expected a string, got {type(value).__name__}")
+        if len(self.values) + len(values) > 0xFFFFFFFF:
+            raise OverflowError("Too many distinct values for an interned column")
+        _check_offset(len(self._items) + len(values))
+
+    def append(self, values: Tuple[str, ...]):
+        for value in values:
+            code = self._codes.get(value)
+            if code is None:
+                code = len(self.values)
+                self.values.append(sys.intern(value))
+                self._codes[value] = code
+            self._items.append(code)
+        self._offsets.append(len(self._items))
+
+    def value(self, position: int) -> List[str]:
+        values = self.values
+        return [values[code] for code in self._items[self._offsets[position]:self._offsets[position + 1]]]
+
+class RecipeCatalog:
+    """Compact in-memory recipe store with columnar storage and secondary indexes.
+
+    Recipes are stored column by column instead of as one dict per recipe:
+    text fields are UTF-8 buffers with row offsets, cuisine, difficulty,
+    ingredients and tags are interned codes, and integers live in typed arrays.
+    The lowercase title and description of every row share one search buffer,
+    so a search is a single substring scan instead of one test per recipe.
+    Cuisine and difficulty filters go through secondary indexes, so
+    filter-and-page only touches matching rows and only the returned page is
+    materialized as dicts.
+    """
+
+    def __init__(self):
+        self._ids = array("q")
+        self._titles = _TextColumn()
+        self._descriptions = _TextColumn(nullable=True)
+        self._ingredients = _InternedListColumn()
+        self._instructions = _TextColumn()
+        self._prep_times = array("i")
+        self._cook_times = array("i")
+        self._servings = array("i")
+        self._difficulties = _InternedColumn()
+        self._cuisines = _InternedColumn()
+        # Rows per (cuisine, difficulty) pair, both lowercased
+        self._pair_index: Dict[Tuple[str, str], array] = {}
+        self._tags = _InternedListColumn()
+        self._created_at: List[Optional[str]] = []
+        self._updated_at: List[Optional[str]] = []
+        # "title\0description\1" per row in lowercase UTF-8; row i spans
+        # _search_offsets[i]:_search_offsets[i + 1]
+        self._search_buffer = bytearray()
+        self._search_offsets = array("I", [0])
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, recipe: dict) -> dict:
+        """Store a recipe dict (same keys as the API returns) and return it.
+
+        Every value is converted and validated before any column changes, so a
+        failing recipe leaves the catalog untouched.
+        """
+        recipe_id = recipe["id"]
+        if not -2 ** 63 <= recipe_id < 2 ** 63:
+            raise OverflowError(f"Recipe id out of range for the catalog: {recipe_id}")
+        title = self._titles.encode(recipe["title"])
+        description = self._descriptions.encode(recipe.get("description"))
+        ingredients = tuple(recipe.get("ingredients") or ())
+        instructions = self._instructions.encode(recipe["instructions"])
+        prep_time = self._pack_int(recipe.get("prep_time"))
+        cook_time = self._pack_int(recipe.get("cook_time"))
+        servings = self._pack_int(recipe.get("servings"))
+        difficulty = recipe.get("difficulty")
+        cuisine = recipe.get("cuisine")
+        tags = tuple(recipe.get("tags") or ())
+        search_text = _encode(
+            f"{recipe['title'].lower()}{_FIELD_SEPARATOR}{(recipe.get('description') or '').lower()}{_ROW_SEPARATOR}"
+        )
+        _check_offset(len(self._search_buffer) + len(search_text))
+        self._difficulties.check(difficulty)
+        self._cuisines.check(cuisine)
+        self._ingredients.check(ingredients)
+        self._tags.check(tags)
+
+        position = len(self._ids)
+        self._ids.append(recipe_id)
+        self._titles.append(title)
+        self._descriptions.append(description)
+        self._ingredients.append(ingredients)
+        self._instructions.append(instructions)
+        self._prep_times.append(prep_time)
+        self._cook_times.append(cook_time)
+        self._servings.append(servings)
+        self._difficulties.append(difficulty)
+        self._cuisines.append(cuisine)
+        pair = ((cuisine or "").lower(), (difficulty or "").lower())
+        self._pair_index.setdefault(pair, array("I")).append(position)
+        self._tags.append(tags)
+        self._created_at.append(recipe.get("created_at"))
+        self._updated_at.append(recipe.get("updated_at"))
+        self._search_buffer += search_text
+        self._search_offsets.append(len(self._search_buffer))
+        return recipe
+
+    def extend(self, recipes: Iterable[dict]):
+        """Store several recipe dicts"""
+        for recipe in recipes:
+            self.add(recipe)
+
+    def query(
+        self,
+        page: int = 1,
+        size: int = 10,
+        search: Optional[str] = None,
+        cuisine: Optional[str] = None,
+        difficulty: Optional[str] = None
+    ) -> Tuple[List[dict], int]:
+        """Filter recipes and return (page of recipe dicts, total matches).
+
+        ``search`` is a case-insensitive substring match on title or description;
+        ``cuisine`` and ``difficulty`` are case-insensitive equality filters.
+        Results keep insertion order; a page below 1 is empty.
+        """
+        rows: Optional[Sequence[int]]
+        if cuisine and difficulty:
+            rows = self._pair_index.get((cuisine.lower(), difficulty.lower()), array("I"))
+        elif cuisine:
+            rows = self._cuisines.rows(cuisine)
+        elif difficulty:
+            rows = self._difficulties.rows(difficulty)
+        else:
+            rows = None
+
+        if search:
+            rows = self._search(search.lower(), rows)
+        elif rows is None:
+            rows = range(len(self._ids))
+
+        if page < 1 or size < 1:
+            return [], len(rows)
+        start = (page - 1) * size
+        return [self.get_row(row) for row in rows[start:start + size]], len(rows)
+
+    def get_row(self, position: int) -> dict:
+        """Materialize the recipe stored at a row position as a dict"""
+        return {
+            "id": self._ids[position],
+            "title": self._titles.value(position),
+            "description": self._descriptions.value(position),
+            "ingredients": self._ingredients.value(position),
+            "instructions": self._instructions.value(position),
+            "prep_time": self._unpack_int(self._prep_times[position]),
+            "cook_time": self._unpack_int(self._cook_times[position]),
+            "servings": self._unpack_int(self._servings[position]),
+            "difficulty": self._difficulties.value(position),
+            "cuisine": self._cuisines.value(position),
+            "tags": self._tags.value(position),
+            "created_at": self._created_at[position],
+            "updated_at": self._updated_at[position]
+        }
+
+    def _search(self, term: str, rows: Optional[Sequence[int]]) -> List[int]:
+        """Rows (all rows when ``rows`` is None) whose title or description contains ``term``"""
+        if _FIELD_SEPARATOR in term or _ROW_SEPARATOR in term:
+            # The term could span the separators, so test the fields themselves
+            candidates = range(len(self._ids)) if rows is None else rows
+            return [
+                row for row in candidates
+                if term in self._titles.value(row).lower() or term in (self._descriptions.value(row) or "").lower()
+            ]
+
+        needle = _encode(term)
+        buffer = self._search_buffer
+        offsets = self._search_offsets
+        if rows is not None:
+            return [row for row in rows if buffer.find(needle, offsets[row], offsets[row + 1]) != -1]
+
+        # One scan over the whole buffer. Rows are numbered by counting row
+        # separators, and after a match the scan resumes at the next row.
+        separator = _ROW_SEPARATOR.encode()
+        matches = []
+        rows_before = 0
+        scanned = 0
+        position = buffer.find(needle)
+        while position != -1:
+            row = rows_before + buffer.count(separator, scanned, position)
+            matches.append(row)
+            scanned = buffer.find(separator, position) + 1
+            rows_before = row + 1
+            position = buffer.find(needle, scanned)
+        return matches
+
+    @staticmethod
+    def _pack_int(value: Optional[int]) -> int:
+        if value is None:
+            return _MISSING_INT
+        if not _MISSING_INT < value <= _MAX_INT:
+            raise OverflowError(f"Integer out of range for the catalog: {value}")
+        return value
+
+    @staticmethod
+    def _unpack_int(value: int) -> Optional[int]:
+        return None if value == _MISSING_INT else value
@@ -3,24 +3,23 @@ from sqlalchemy import select, func, and_, or_
 from app.database import database
 from app.models.recipe import Recipe as RecipeModel
 from app.schemas.recipe import Recipe, RecipeCreate, RecipeUpdate, RecipeSearchResult
+from app.services.embedding_queue import EmbeddingQueue
+from app.services.neighbor_service import NeighborService
 from app.services.semantic_search_service import SemanticSearchService
 import json
 
 class RecipeService:
     def __init__(self):
-        self.semantic_service = SemanticSearchService()
+        self.embedding_queue = EmbeddingQueue()
+        self.neighbor_service = NeighborService()
 
     async def create_recipe(self, recipe_data: RecipeCreate) -> Recipe:
-        """Create a new recipe with semantic embedding"""
-        # Generate embedding for semantic search
-        recipe_text = f"{recipe_data.title} {recipe_data.description or ''} {' '.join(recipe_data.ingredients)} {recipe_data.instructions}"
-        embedding = await self.semantic_service.generate_embedding(recipe_text)
-        
+        """Create a new recipe and queue its semantic embeddings"""
         query = """
         INSERT INTO recipes (title, description, ingredients, instructions, prep_time, cook_time, 
-                           servings, difficulty, cuisine, tags, embedding, created_at) 
+                           servings, difficulty, cuisine, tags, embedding_status, created_at) 
         VALUES (:title, :description, :ingredients, :instructions, :prep_time, :cook_time, 
-                :servings, :difficulty, :cuisine, :tags, :embedding, NOW()) 
+                :servings, :difficulty, :cuisine, :tags, 'pending', NOW()) 
         RETURNING *
         """
         
@@ -35,10 +34,13 @@ class RecipeService:
             "difficulty": recipe_data.difficulty,
             "cuisine": recipe_data.cuisine,
             "tags": json.dumps(recipe_data.tags) if recipe_data.tags else None,
-            "embedding": json.dumps(embedding.tolist()) if embedding is not None else None
         }
         
-        result = await database.fetch_one(query=query, values=values)
+        # Embeddings are generated by the embedding workers after commit
+        async with database.transaction():
+            result = await database.fetch_one(query=query, values=values)
+            await self.embedding_queue.enqueue(result["id"])
+        EmbeddingQueue.notify()
         return self._row_to_recipe(result)
 
     async def get_recipe_by_id(self, recipe_id: int) -> Optional[Recipe]:
@@ -119,17 +121,13 @@ class RecipeService:
         if not update_fields:
             return current_recipe
         
-        # Regenerate embedding if content changed
+        # Regenerate embeddings if content changed; the current ones stay searchable until then
         content_fields = {'title', 'description', 'ingredients', 'instructions'}
-        if any(field in recipe_update.model_dump(exclude_unset=True) for field in content_fields):
-            # Merge updated data with current recipe
-            updated_recipe_data = current_recipe.model_dump()
-            updated_recipe_data.update(recipe_update.model_dump(exclude_unset=True))
-            
-            recipe_text = f"{updated_recipe_data['title']} {updated_recipe_data.get('description', '') or ''} {' '.join(updated_recipe_data['ingredients'])} {updated_recipe_data['instructions']}"
-            embedding = await self.semantic_service.generate_embedding(recipe_text)
-            update_data["embedding"] = json.dumps(embedding.tolist()) if embedding is not None else None
-            update_fields.append("embedding = :embedding")
+        content_changed = any(field in recipe_update.model_dump(exclude_unset=True) for field in content_fields)
+        if content_changed:
+            # Embedding jobs only store vectors computed from the current content_version
+            update_fields.append("content_version = content_version + 1")
+            update_fields.append("embedding_status = 'pending'")
         
         update_data["recipe_id"] = recipe_id
         update_fields.append("updated_at = NOW()")
@@ -141,13 +139,25 @@ class RecipeService:
         RETURNING *
         """
         
-        result = await database.fetch_one(query=query, values=update_data)
+        async with database.transaction():
+            result = await database.fetch_one(query=query, values=update_data)
+            if result and content_changed:
+                await self.embedding_queue.enqueue(recipe_id)
+        if result and content_changed:
+            EmbeddingQueue.notify()
         return self._row_to_recipe(result) if result else None
 
     async def delete_recipe(self, recipe_id: int) -> bool:
         """Delete a recipe"""
+        # Lists that contain this recipe lose an entry when the delete cascades
+        referencing = await self.neighbor_service.referencing(recipe_id)
+        
         query = "DELETE FROM recipes WHERE id = :recipe_id"
         result = await database.execute(query=query, values={"recipe_id": recipe_id})
+        if result > 0:
+            SemanticSearchService.remove_from_index(recipe_id)
+            if referencing:
+                NeighborService.schedule(self.neighbor_service.refresh_recipes(referencing))
         return result > 0
 
     def _row_to_recipe(self, row) -> Recipe:
@@ -167,6 +177,7 @@ class RecipeService:
             difficulty=row["difficulty"],
             cuisine=row["cuisine"],
             tags=json.loads(row["tags"]) if row["tags"] else [],
+            embedding_status=row["embedding_status"],
             created_at=row["created_at"],
             updated_at=row["updated_at"]
         )
\ No newline at end of file
@@ -1,106 +1,254 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+from app.config import settings
 from app.database import database
 from app.schemas.recipe import Recipe
-from app.services.recipe_service import RecipeService
+from app.services.embedding_index import EMBEDDING_FIELDS, RecipeEmbeddingIndex, decode_vector, encode_vector
+from app.services.inference_executor import InferenceOverloaded, InferenceTimeout, get_inference_executor
+from app.services.query_cache import SemanticQueryCache
 import json
 import asyncio
 import threading
 
+RECIPE_COLUMNS = """id, title, description, ingredients, instructions, prep_time, cook_time,
+       servings, difficulty, cuisine, tags, embedding_status, created_at, updated_at"""
+
+EMBEDDING_COLUMNS = ", ".join(f"{field}_embedding" for field in EMBEDDING_FIELDS)
+
+DEFAULT_FIELD_WEIGHTS = {"title": 1.0, "ingredients": 1.0, "instructions": 0.5}
+
+# MiniLM truncates inputs at 256 word pieces, so long instructions are embedded
+# in chunks of this many words and mean-pooled
+INSTRUCTION_CHUNK_WORDS = 150
+
+def build_field_texts(title: str, description: Optional[str], ingredients: List[str], instructions: str) -> Dict[str, List[str]]:
+    """Split a recipe into the texts embedded for each field"""
+    words = instructions.split()
+    chunks = [
+        " ".join(words[i:i + INSTRUCTION_CHUNK_WORDS])
+        for i in range(0, len(words), INSTRUCTION_CHUNK_WORDS)
+    ]
+    return {
+        "title": [f"{title}. {description}" if description else title],
+        "ingredients": [", ".join(ingredients) or title],
+        "instructions": chunks or [title],
+    }
+
 class SemanticSearchService:
-    _model = None
+    _query_cache = None
+    _index = None
+    # Index changes made while the index is loading, replayed once it is loaded
+    _pending_changes: Optional[list] = None
+    _index_lock = asyncio.Lock()
     _lock = threading.Lock()
     
     def __init__(self):
-        self.model = self._get_model()
+        self.inference = get_inference_executor()
+        self.query_cache = self._get_query_cache(settings.embedding_dimension)
     
     @classmethod
-    def _get_model(cls):
-        """Get the sentence transformer model (singleton pattern)"""
-        if cls._model is None:
+    def _get_query_cache(cls, dim: int) -> SemanticQueryCache:
+        """Get the process-wide semantic query cache"""
+        if cls._query_cache is None:
             with cls._lock:
-                if cls._model is None:
-                    # Use a lightweight model for better performance
-                    cls._model = SentenceTransformer('all-MiniLM-L6-v2')
-        return cls._model
+                if cls._query_cache is None:
+                    cls._query_cache = SemanticQueryCache(
+                        max_entries=settings.semantic_cache_size,
+                        threshold=settings.semantic_cache_threshold,
+                        dim=dim
+                    )
+        return cls._query_cache
+    
+    @classmethod
+    def invalidate_cache(cls):
+        """Forget cached search rankings after recipes are created, changed or deleted"""
+        if cls._query_cache is not None:
+            cls._query_cache.invalidate()
+    
+    @classmethod
+    def index_recipe(cls, recipe_id: int, vectors: Dict[str, np.ndarray]):
+        """Add or refresh a recipe in the in-memory embedding index"""
+        if cls._index is not None:
+            cls._index.upsert(recipe_id, vectors)
+        elif cls._pending_changes is not None:
+            cls._pending_changes.append((recipe_id, vectors))
+        cls.invalidate_cache()
+    
+    @classmethod
+    def remove_from_index(cls, recipe_id: int):
+        """Remove a deleted recipe from the in-memory embedding index"""
+        if cls._index is not None:
+            cls._index.remove(recipe_id)
+        elif cls._pending_changes is not None:
+            cls._pending_changes.append((recipe_id, None))
+        cls.invalidate_cache()
+    
+    async def get_index(self) -> RecipeEmbeddingIndex:
+        """Get the embedding index, loading it from the database on first use"""
+        cls = type(self)
+        if cls._index is None:
+            async with cls._index_lock:
+                if cls._index is None:
+                    index = RecipeEmbeddingIndex(settings.embedding_dimension)
+                    # Changes committed while the rows are read may be missing from them
+                    cls._pending_changes = []
+                    try:
+                        rows = await database.fetch_all(query=f"""
+                        SELECT id, {EMBEDDING_COLUMNS}
+                        FROM recipes
+                        WHERE {" AND ".join(f"{field}_embedding IS NOT NULL" for field in EMBEDDING_FIELDS)}
+                        """)
+                        index.load(
+                            (row["id"], {field: decode_vector(row[f"{field}_embedding"]) for field in EMBEDDING_FIELDS})
+                            for row in rows
+                        )
+                        # No await from here on, so no change can slip in before the swap
+                        for recipe_id, vectors in cls._pending_changes:
+                            if vectors is None:
+                                index.remove(recipe_id)
+                            else:
+                                index.upsert(recipe_id, vectors)
+                        cls._index = index
+                    finally:
+                        cls._pending_changes = None
+        return cls._index
     
     async def generate_embedding(self, text: str) -> Optional[np.ndarray]:
         """Generate embedding for given text"""
         try:
-            # Run the embedding generation in a thread to avoid blocking
-            loop = asyncio.get_event_loop()
-            embedding = await loop.run_in_executor(
-                None, 
-                lambda: self.model.encode([text], convert_to_tensor=False)[0]
-            )
-            return embedding
+            # Run the embedding generation on the bounded inference pool
+            embeddings = await self.inference.encode([text])
+            return embeddings[0]
+        except (InferenceOverloaded, InferenceTimeout):
+            raise
         except Exception as e:
             print(f"Error generating embedding: {e}")
             return None
     
-    async def semantic_search(self, query: str, limit: int = 10, min_score: float = 0.0) -> List[Recipe]:
-        """Perform semantic search on recipes"""
+    async def generate_field_embeddings(
+        self,
+        title: str,
+        description: Optional[str],
+        ingredients: List[str],
+        instructions: str
+    ) -> Optional[Dict[str, np.ndarray]]:
+        """Generate one embedding per recipe field (title, ingredients, instructions)"""
         try:
+            field_texts = build_field_texts(title, description, ingredients, instructions)
+            return (await self.encode_field_texts([field_texts]))[0]
+        except (InferenceOverloaded, InferenceTimeout):
+            raise
+        except Exception as e:
+            print(f"Error generating field embeddings: {e}")
+            return None
+    
+    async def encode_field_texts(self, recipes_field_texts: List[Dict[str, List[str]]]) -> List[Dict[str, np.ndarray]]:
+        """Embed the field texts of several recipes in as few model calls as possible (raises on failure)"""
+        texts = [
+            text
+            for field_texts in recipes_field_texts
+            for field in EMBEDDING_FIELDS
+            for text in field_texts[field]
+        ]
+        
+        # Cap the texts per call so every call fits within the inference timeout
+        batch_size = max(1, settings.inference_max_batch_texts)
+        embeddings = np.concatenate([
+            np.asarray(await self.inference.encode(texts[start:start + batch_size]))
+            for start in range(0, len(texts), batch_size)
+        ])
+        
+        # Mean-pool each field's chunks back into one vector
+        results = []
+        offset = 0
+        for field_texts in recipes_field_texts:
+            vectors = {}
+            for field in EMBEDDING_FIELDS:
+                count = len(field_texts[field])
+                vectors[field] = np.mean(embeddings[offset:offset + count], axis=0).astype(np.float32)
+                offset += count
+            results.append(vectors)
+        return results
+    
+    async def semantic_search(
+        self,
+        query: str,
+        limit: int = 10,
+        min_score: float = 0.0,
+        weights: Optional[Dict[str, float]] = None
+    ) -> List[Recipe]:
+        """Perform semantic search on recipes, weighting each field's similarity"""
+        key = SemanticQueryCache.normalize_query(query)
+        weights = weights or DEFAULT_FIELD_WEIGHTS
+        scope = tuple(float(weights.get(field, 0.0)) for field in EMBEDDING_FIELDS)
+        # Identical concurrent searches share a single execution
+        return await self.query_cache.coalesce(
+            f"{key}|{limit}|{min_score}|{scope}",
+            lambda: self._run_semantic_search(key, limit, min_score, weights, scope)
+        )
+    
+    async def _run_semantic_search(self, query: str, limit: int, min_score: float, weights: Dict[str, float], scope) -> List[Recipe]:
+        """Search using the query caches, falling back to a full index scan"""
+        try:
+            generation = self.query_cache.generation
+            
             # Generate embedding for the search query
-            query_embedding = await self.generate_embedding(query)
+            query_embedding = self.query_cache.get_embedding(query)
             if query_embedding is None:
-                return []
-            
-            # Get all recipes with embeddings
-            recipes_query = """
-            SELECT id, title, description, ingredients, instructions, prep_time, cook_time, 
-                   servings, difficulty, cuisine, tags, embedding, created_at, updated_at
-            FROM recipes 
-            WHERE embedding IS NOT NULL
-            """
-            
-            recipes_data = await database.fetch_all(query=recipes_query)
-            if not recipes_data:
-                return []
+                query_embedding = await self.generate_embedding(query)
+                if query_embedding is None:
+                    return []
+                self.query_cache.put_embedding(query, query_embedding)
             
-            # Calculate similarities
-            similarities = []
-            recipe_objects = []
+            # Reuse the ranking of a near-duplicate query when there is one
+            cached = self.query_cache.lookup(query_embedding, limit, scope)
+            if cached is not None:
+                ranked_ids, scores = cached
+            else:
+                index = await self.get_index()
+                # The scan is CPU-bound and holds the index lock, so keep it off the event loop
+                loop = asyncio.get_event_loop()
+                top_k = max(limit, settings.semantic_cache_top_k)
+                ranked_ids, scores = await loop.run_in_executor(
+                    None, lambda: index.search(query_embedding, weights, top_k)
+                )
+                self.query_cache.store(query_embedding, ranked_ids, scores, top_k, generation, scope)
             
-            for row in recipes_data:
-                try:
-                    recipe_embedding = np.array(json.loads(row["embedding"]))
-                    
-                    # Calculate cosine similarity
-                    similarity = cosine_similarity(
-                        [query_embedding], 
-                        [recipe_embedding]
-                    )[0][0]
-                    
-                    if similarity >= min_score:
-                        similarities.append((similarity, row))
-                        
-                except (json.JSONDecodeError, ValueError) as e:
-                    print(f"Error processing embedding for recipe {row['id']}: {e}")
-                    continue
-            
-            # Sort by similarity score (descending)
-            similarities.sort(key=lambda x: x[0], reverse=True)
+            # Only load the rows that can make it into the result
+            selected_ids = [
+                recipe_id for recipe_id, similarity_score in zip(ranked_ids, scores)
+                if similarity_score >= min_score
+            ][:limit]
+            rows_by_id = await self._fetch_rows(selected_ids)
             
-            # Convert to Recipe objects and limit results
+            # Convert to Recipe objects in ranking order
             results = []
-            for similarity_score, row in similarities[:limit]:
-                recipe = self._row_to_recipe(row)
+            for recipe_id in selected_ids:
+                row = rows_by_id.get(recipe_id)
+                recipe = self._row_to_recipe(row) if row else None
                 if recipe:
                     results.append(recipe)
             
             return results
             
+        except (InferenceOverloaded, InferenceTimeout):
+            raise
         except Exception as e:
             print(f"Error in semantic search: {e}")
             return []
     
-    async def reindex_all_recipes(self):
-        """Regenerate embeddings for all recipes (useful for maintenance)"""
+    async def _fetch_rows(self, recipe_ids: List[int]):
+        """Load recipe rows for the given ids, keyed by id"""
+        if not recipe_ids:
+            return {}
+        query = f"SELECT {RECIPE_COLUMNS} FROM recipes WHERE id = ANY(:recipe_ids)"
+        rows = await database.fetch_all(query=query, values={"recipe_ids": list(recipe_ids)})
+        return {row["id"]: row for row in rows}
+    
+    async def reindex_all_recipes(self) -> int:
+        """Regenerate field embeddings for all recipes (useful for maintenance); returns the number skipped"""
+        skipped = 0
         try:
-            # Get all recipes without embeddings or with null embeddings
             recipes_query = """
             SELECT id, title, description, ingredients, instructions
             FROM recipes
@@ -109,28 +257,45 @@ class SemanticSearchService:
             recipes = await database.fetch_all(query=recipes_query)
             
             for recipe in recipes:
-                recipe_text = f"{recipe['title']} {recipe['description'] or ''} {' '.join(json.loads(recipe['ingredients']) if recipe['ingredients'] else [])} {recipe['instructions']}"
-                embedding = await self.generate_embedding(recipe_text)
+                vectors = await self._generate_field_embeddings_with_retry(recipe)
                 
-                if embedding is not None:
-                    update_query = """
-                    UPDATE recipes 
-                    SET embedding = :embedding 
-                    WHERE id = :recipe_id
-                    """
-                    
-                    await database.execute(
-                        query=update_query, 
-                        values={
-                            "embedding": json.dumps(embedding.tolist()),
-                            "recipe_id": recipe["id"]
-                        }
-                    )
+                if vectors is None:
+                    skipped += 1
+                    continue
+                
+                update_query = f"""
+                UPDATE recipes 
+                SET {", ".join(f"{field}_embedding = :{field}_embedding" for field in EMBEDDING_FIELDS)},
+                    embedding_status = 'ready'
+                WHERE id = :recipe_id
+                """
+                
+                values = {f"{field}_embedding": encode_vector(vectors[field]) for field in EMBEDDING_FIELDS}
+                values["recipe_id"] = recipe["id"]
+                await database.execute(query=update_query, values=values)
+                self.index_recipe(recipe["id"], vectors)
             
-            print(f"Reindexed {len(recipes)} recipes")
+            print(f"Reindexed {len(recipes) - skipped} recipes, skipped {skipped}")
             
         except Exception as e:
             print(f"Error reindexing recipes: {e}")
+        return skipped
+    
+    async def _generate_field_embeddings_with_retry(self, recipe) -> Optional[Dict[str, np.ndarray]]:
+        """Embed one recipe, backing off while the inference pool is overloaded or timing out"""
+        for attempt in range(settings.embedding_max_attempts):
+            try:
+                return await self.generate_field_embeddings(
+                    recipe["title"],
+                    recipe["description"],
+                    json.loads(recipe["ingredients"]) if recipe["ingredients"] else [],
+                    recipe["instructions"]
+                )
+            except (InferenceOverloaded, InferenceTimeout) as e:
+                print(f"Error embedding recipe {recipe['id']} (attempt {attempt + 1}): {e}")
+                if attempt + 1 < settings.embedding_max_attempts:
+                    await asyncio.sleep(min(settings.embedding_retry_base_seconds * 2 ** attempt, settings.embedding_retry_max_seconds))
+        return None
     
     def _row_to_recipe(self, row) -> Optional[Recipe]:
         """Convert database row to Recipe model"""
@@ -147,6 +312,7 @@ class SemanticSearchService:
                 difficulty=row["difficulty"],
                 cuisine=row["cuisine"],
                 tags=json.loads(row["tags"]) if row["tags"] else [],
+                embedding_status=row["embedding_status"],
                 created_at=row["created_at"],
                 updated_at=row["updated_at"]
             )
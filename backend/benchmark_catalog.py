@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Memory and latency benchmark: RecipeCatalog vs. a plain list of recipe dicts.
+Usage: python benchmark_catalog.py [number_of_recipes]
+"""
+
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from app.services.recipe_catalog import RecipeCatalog
+
+CUISINES = ["Italian", "Mexican", "Japanese", "Indian", "French", "Thai", "Greek", "Chinese", "Spanish", "Korean"]
+DIFFICULTIES = ["easy", "medium", "hard"]
+WORDS = ["pasta", "chicken", "spicy", "quick", "soup", "salad", "roasted", "garlic", "lemon", "creamy", "tofu", "curry"]
+
+def make_recipes(count: int):
+    """Generate recipe dicts shaped like the ones recipes_simple stores"""
+    rng = random.Random(42)
+    for recipe_id in range(1, count + 1):
+        yield {
+            "id": recipe_id,
+            "title": " ".join(rng.choices(WORDS, k=3)).title(),
+            "description": " ".join(rng.choices(WORDS, k=8)),
+            "ingredients": rng.sample(WORDS, k=4),
+            "instructions": "Mix everything and cook until done.",
+            "prep_time": rng.randint(5, 60),
+            "cook_time": rng.randint(5, 120),
+            "servings": rng.randint(1, 8),
+            "difficulty": rng.choice(DIFFICULTIES),
+            "cuisine": rng.choice(CUISINES),
+            "tags": rng.sample(WORDS, k=2),
+            "created_at": "2024-10-09T00:00:00Z",
+            "updated_at": "2024-10-09T00:00:00Z"
+        }
+
+def query_dict_list(recipes, page, size, search=None, cuisine=None, difficulty=None):
+    """The filtering the router did before RecipeCatalog"""
+    filtered_recipes = recipes.copy()
+    if search:
+        filtered_recipes = [r for r in filtered_recipes if
+                            search.lower() in r.get("title", "").lower() or
+                            search.lower() in r.get("description", "").lower()]
+    if cuisine:
+        filtered_recipes = [r for r in filtered_recipes if r.get("cuisine", "").lower() == cuisine.lower()]
+    if difficulty:
+        filtered_recipes = [r for r in filtered_recipes if r.get("difficulty", "").lower() == difficulty.lower()]
+    start = (page - 1) * size
+    return filtered_recipes[start:start + size], len(filtered_recipes)
+
+def measure_memory(build):
+    """Return (store, bytes allocated while building it)"""
+    gc.collect()
+    tracemalloc.start()
+    store = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return store, current
+
+def measure_latency(run, repeat: int = 5) -> float:
+    """Best wall time of ``repeat`` runs in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"Benchmarking {count:,} recipes\n")
+
+    dict_list, dict_bytes = measure_memory(lambda: list(make_recipes(count)))
+
+    def build_catalog():
+        catalog = RecipeCatalog()
+        catalog.extend(make_recipes(count))
+        return catalog
+    catalog, catalog_bytes = measure_memory(build_catalog)
+
+    print(f"{'Memory':<40}{'dict list':>14}{'catalog':>14}")
+    print(f"{'':<40}{dict_bytes / 2**20:>11.1f} MB{catalog_bytes / 2**20:>11.1f} MB\n")
+
+    queries = [
+        ("page 1, no filters", dict(page=1, size=10)),
+        ("deep page, no filters", dict(page=count // 20, size=10)),
+        ("cuisine", dict(page=1, size=10, cuisine="italian")),
+        ("cuisine + difficulty", dict(page=1, size=10, cuisine="Thai", difficulty="hard")),
+        ("search", dict(page=1, size=10, search="lemon tofu")),
+        ("search + cuisine", dict(page=1, size=10, search="garlic", cuisine="Greek")),
+    ]
+
+    print(f"{'Latency (best of 5)':<40}{'dict list':>14}{'catalog':>14}")
+    for name, params in queries:
+        expected = query_dict_list(dict_list, **params)
+        actual = catalog.query(**params)
+        assert expected == actual, f"Results differ for {name}"
+        dict_ms = measure_latency(lambda: query_dict_list(dict_list, **params))
+        catalog_ms = measure_latency(lambda: catalog.query(**params))
+        print(f"{name:<40}{dict_ms:>11.2f} ms{catalog_ms:>11.2f} ms")
+
+if __name__ == "__main__":
+    main()
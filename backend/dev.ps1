@@ -19,6 +19,7 @@ function Show-Help {
     Write-Host "  check-format Check code formatting" -ForegroundColor Green
     Write-Host "  type-check   Run type checking (mypy)" -ForegroundColor Green
     Write-Host "  db-init      Initialize database tables" -ForegroundColor Green
+    Write-Host "  db-neighbors Rebuild precomputed similar recipe lists" -ForegroundColor Green
     Write-Host ""
     Write-Host "Usage:" -ForegroundColor Yellow
     Write-Host "  .\dev.ps1 install" -ForegroundColor White
@@ -84,6 +85,11 @@ function Initialize-Database {
     poetry run python create_db.py
 }
 
+function Rebuild-Neighbors {
+    Write-Host "🧭 Rebuilding similar recipe lists..." -ForegroundColor Blue
+    poetry run python rebuild_neighbors.py
+}
+
 # Execute command based on parameter
 switch ($Command.ToLower()) {
     "help" { Show-Help }
@@ -97,6 +103,7 @@ switch ($Command.ToLower()) {
     "check-format" { Check-Format }
     "type-check" { Check-Types }
     "db-init" { Initialize-Database }
+    "db-neighbors" { Rebuild-Neighbors }
     default {
         Write-Host "Unknown command: $Command" -ForegroundColor Red
         Write-Host ""
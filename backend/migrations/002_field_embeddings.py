@@ -0,0 +1,26 @@
+"""Per-field recipe embeddings
+
+Revision ID: 002
+Revises: 001
+Create Date: 2024-11-01 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # float32 vectors stored as raw bytes; populate with SemanticSearchService.reindex_all_recipes()
+    op.add_column('recipes', sa.Column('title_embedding', sa.LargeBinary(), nullable=True))
+    op.add_column('recipes', sa.Column('ingredients_embedding', sa.LargeBinary(), nullable=True))
+    op.add_column('recipes', sa.Column('instructions_embedding', sa.LargeBinary(), nullable=True))
+
+def downgrade():
+    op.drop_column('recipes', 'instructions_embedding')
+    op.drop_column('recipes', 'ingredients_embedding')
+    op.drop_column('recipes', 'title_embedding')
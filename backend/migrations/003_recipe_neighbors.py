@@ -0,0 +1,35 @@
+"""Precomputed recipe neighbors
+
+Revision ID: 003
+Revises: 002
+Create Date: 2024-11-15 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Populate with `python rebuild_neighbors.py`
+    op.create_table(
+        'recipe_neighbors',
+        sa.Column('recipe_id', sa.Integer(), nullable=False),
+        sa.Column('rank', sa.Integer(), nullable=False),
+        sa.Column('neighbor_id', sa.Integer(), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['recipe_id'], ['recipes.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['neighbor_id'], ['recipes.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('recipe_id', 'rank')
+    )
+    op.create_index(op.f('ix_recipe_neighbors_neighbor_id'), 'recipe_neighbors', ['neighbor_id'], unique=False)
+    op.create_index('ix_recipe_neighbors_rank_score', 'recipe_neighbors', ['rank', 'score'], unique=False)
+
+def downgrade():
+    op.drop_index('ix_recipe_neighbors_rank_score', table_name='recipe_neighbors')
+    op.drop_index(op.f('ix_recipe_neighbors_neighbor_id'), table_name='recipe_neighbors')
+    op.drop_table('recipe_neighbors')
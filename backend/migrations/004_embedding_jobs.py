@@ -0,0 +1,58 @@
+"""Background embedding queue
+
+Revision ID: 004
+Revises: 003
+Create Date: 2024-12-01 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column(
+        'recipes',
+        sa.Column('embedding_status', sa.String(length=20), server_default='pending', nullable=False)
+    )
+    op.add_column(
+        'recipes',
+        sa.Column('content_version', sa.Integer(), server_default='0', nullable=False)
+    )
+    # Recipes that already have field embeddings are ready
+    op.execute("UPDATE recipes SET embedding_status = 'ready' WHERE title_embedding IS NOT NULL")
+
+    op.create_table(
+        'embedding_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('recipe_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), server_default='queued', nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('available_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('locked_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['recipe_id'], ['recipes.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_embedding_jobs_recipe_id'), 'embedding_jobs', ['recipe_id'], unique=False)
+    op.create_index('ix_embedding_jobs_status_available_at', 'embedding_jobs', ['status', 'available_at'], unique=False)
+    op.create_index(
+        'ix_embedding_jobs_queued_recipe_id', 'embedding_jobs', ['recipe_id'],
+        unique=True, postgresql_where=sa.text("status = 'queued'")
+    )
+
+    # Queue the recipes that still need embeddings
+    op.execute("INSERT INTO embedding_jobs (recipe_id) SELECT id FROM recipes WHERE embedding_status = 'pending'")
+
+def downgrade():
+    op.drop_index('ix_embedding_jobs_queued_recipe_id', table_name='embedding_jobs')
+    op.drop_index('ix_embedding_jobs_status_available_at', table_name='embedding_jobs')
+    op.drop_index(op.f('ix_embedding_jobs_recipe_id'), table_name='embedding_jobs')
+    op.drop_table('embedding_jobs')
+    op.drop_column('recipes', 'content_version')
+    op.drop_column('recipes', 'embedding_status')
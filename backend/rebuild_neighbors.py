@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+
+import asyncio
+from app.database import database
+from app.services.neighbor_service import NeighborService
+
+async def rebuild_neighbors():
+    """Precompute similar recipe lists for every recipe"""
+    await database.connect()
+    try:
+        count = await NeighborService().rebuild_all()
+        print(f"Neighbor lists rebuilt for {count} recipes!")
+    except Exception as e:
+        print(f"Error rebuilding neighbors: {e}")
+    finally:
+        await database.disconnect()
+
+async def main():
+    await rebuild_neighbors()
+
+if __name__ == "__main__":
+    asyncio.run(main())
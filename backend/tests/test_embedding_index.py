@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+from pydantic import ValidationError
+from app.schemas.recipe import FieldWeights
+from app.services.embedding_index import EMBEDDING_FIELDS, RecipeEmbeddingIndex
+
+DIM = 8
+
+def unit(vector):
+    return vector / np.linalg.norm(vector)
+
+def brute_force_search(vectors_by_id, query, weights, top_k):
+    """Weighted per-field cosine of the query against every recipe"""
+    field_weights = np.array([weights.get(field, 0.0) for field in EMBEDDING_FIELDS])
+    field_weights /= field_weights.sum()
+    scores = {
+        recipe_id: sum(
+            weight * float(unit(vectors[field]) @ unit(query))
+            for weight, field in zip(field_weights, EMBEDDING_FIELDS)
+        )
+        for recipe_id, vectors in vectors_by_id.items()
+    }
+    ranked = sorted(scores, key=lambda recipe_id: -scores[recipe_id])[:top_k]
+    return ranked, [scores[recipe_id] for recipe_id in ranked]
+
+@pytest.fixture
+def vectors_by_id():
+    rng = np.random.default_rng(5)
+    return {
+        recipe_id: {field: rng.normal(size=DIM).astype(np.float32) for field in EMBEDDING_FIELDS}
+        for recipe_id in range(1, 41)
+    }
+
+@pytest.fixture
+def index(vectors_by_id):
+    index = RecipeEmbeddingIndex(DIM, initial_capacity=4)
+    for recipe_id, vectors in vectors_by_id.items():
+        index.upsert(recipe_id, vectors)
+    return index
+
+@pytest.mark.parametrize("weights", [
+    {"title": 1.0, "ingredients": 1.0, "instructions": 0.5},
+    {"title": 0.2, "ingredients": 1.0, "instructions": 0.0},
+    {"instructions": 3.0},
+])
+def test_weighted_search_matches_brute_force(index, vectors_by_id, weights):
+    query = np.random.default_rng(6).normal(size=DIM).astype(np.float32)
+    ids, scores = index.search(query, weights, 10)
+    expected_ids, expected_scores = brute_force_search(vectors_by_id, query, weights, 10)
+    assert ids == expected_ids
+    assert np.allclose(scores, expected_scores, atol=1e-5)
+
+def test_ingredient_weighted_search_ranks_by_ingredient_vectors(index, vectors_by_id):
+    # Recipe 7 shares the query's ingredients, recipe 8 only its title
+    query = vectors_by_id[7]["ingredients"].copy()
+    index.upsert(8, {**vectors_by_id[8], "title": query})
+
+    ids, _ = index.search(query, {"title": 0.0, "ingredients": 1.0, "instructions": 0.0}, 3)
+    assert ids[0] == 7
+    ids, _ = index.search(query, {"title": 1.0, "ingredients": 0.0, "instructions": 0.0}, 3)
+    assert ids[0] == 8
+
+def test_search_on_empty_index():
+    assert RecipeEmbeddingIndex(DIM).search(np.ones(DIM), {"title": 1.0}, 5) == ([], [])
+
+def test_field_weights_default_and_partial():
+    assert FieldWeights().model_dump() == {"title": 1.0, "ingredients": 1.0, "instructions": 0.5}
+    assert FieldWeights(ingredients=2.0, instructions=0.0).model_dump() == {"title": 1.0, "ingredients": 2.0, "instructions": 0.0}
+
+@pytest.mark.parametrize("weights", [
+    dict(title=0.0, ingredients=0.0, instructions=0.0),
+    dict(title=-1.0),
+])
+def test_field_weights_reject_invalid(weights):
+    with pytest.raises(ValidationError):
+        FieldWeights(**weights)
@@ -0,0 +1,233 @@
+import asyncio
+import numpy as np
+import pytest
+from app.config import settings
+from app.services import embedding_queue
+from app.services.embedding_index import EMBEDDING_FIELDS
+from app.services.embedding_queue import EmbeddingQueue, EmbeddingWorkerPool
+from app.services.inference_executor import InferenceOverloaded, InferenceTimeout
+from app.services.neighbor_service import NeighborService
+from app.services.semantic_search_service import SemanticSearchService
+
+class FakeTransaction:
+    def __init__(self, database):
+        self.database = database
+
+    async def __aenter__(self):
+        self.database.depth += 1
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.database.depth -= 1
+        return False
+
+class FakeDatabase:
+    """Records every statement; recipes are served to SELECTs and stale ids reject _store"""
+
+    def __init__(self, recipes=None, stale=()):
+        self.recipes = recipes or {}
+        self.stale = set(stale)
+        self.statements = []
+        self.depth = 0
+
+    def transaction(self):
+        return FakeTransaction(self)
+
+    async def execute(self, query, values=None):
+        self.statements.append((" ".join(query.split()), values or {}, self.depth))
+
+    async def fetch_all(self, query, values=None):
+        self.statements.append((" ".join(query.split()), values or {}, self.depth))
+        if "FROM recipes" in query:
+            return [self.recipes[recipe_id] for recipe_id in values["recipe_ids"] if recipe_id in self.recipes]
+        return []
+
+    async def fetch_one(self, query, values=None):
+        self.statements.append((" ".join(query.split()), values or {}, self.depth))
+        if values["recipe_id"] in self.stale:
+            return None
+        return {"id": values["recipe_id"]}
+
+def make_recipe(recipe_id, title=None):
+    return {
+        "id": recipe_id,
+        "title": title or f"Recipe {recipe_id}",
+        "description": None,
+        "ingredients": '["salt"]',
+        "instructions": "Cook it.",
+        "content_version": 1
+    }
+
+def make_job(job_id, recipe_id=None, attempts=0):
+    return {"id": job_id, "recipe_id": recipe_id or job_id, "attempts": attempts}
+
+class RecordingQueue(EmbeddingQueue):
+    """Real queue methods, with every call recorded as (method, job id)"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def complete(self, job_id):
+        self.calls.append(("complete", job_id))
+
+    async def release(self, job_id, delay=0):
+        self.calls.append(("release", job_id))
+
+    async def fail(self, job, error):
+        self.calls.append(("fail", job["id"]))
+
+    async def give_up(self, job, error, attempts=None):
+        self.calls.append(("give_up", job["id"]))
+
+class FakeSemanticService:
+    """Encodes every recipe to fixed vectors; titles containing 'slow' time out"""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.batches = []
+
+    async def encode_field_texts(self, recipes_field_texts):
+        self.batches.append(len(recipes_field_texts))
+        if self.error is not None:
+            raise self.error
+        if any("slow" in field_texts["title"][0] for field_texts in recipes_field_texts):
+            raise InferenceTimeout("too slow")
+        return [{field: np.ones(4, dtype=np.float32) for field in EMBEDDING_FIELDS} for _ in recipes_field_texts]
+
+class FakeNeighborService:
+    def __init__(self):
+        self.refreshed = []
+
+    async def refresh_recipe(self, recipe_id):
+        self.refreshed.append(recipe_id)
+
+@pytest.fixture
+def indexed(monkeypatch):
+    recipe_ids = []
+    monkeypatch.setattr(SemanticSearchService, "index_recipe", classmethod(lambda cls, recipe_id, vectors: recipe_ids.append(recipe_id)))
+    return recipe_ids
+
+def make_pool(monkeypatch, database, semantic_service=None):
+    monkeypatch.setattr(embedding_queue, "database", database)
+    pool = EmbeddingWorkerPool.__new__(EmbeddingWorkerPool)
+    pool.queue = RecordingQueue()
+    pool.semantic_service = semantic_service or FakeSemanticService()
+    pool.neighbor_service = FakeNeighborService()
+    return pool
+
+def run_batch(pool, jobs):
+    async def scenario():
+        await pool.process_batch(jobs)
+        # Let the scheduled neighbor refreshes run
+        await asyncio.gather(*NeighborService._background_tasks)
+
+    asyncio.run(scenario())
+    return pool.queue.calls
+
+def test_enqueue_relies_on_the_partial_unique_index(monkeypatch):
+    database = FakeDatabase()
+    monkeypatch.setattr(embedding_queue, "database", database)
+    asyncio.run(EmbeddingQueue().enqueue(7))
+    query, values, _ = database.statements[0]
+    assert "ON CONFLICT (recipe_id) WHERE status = 'queued' DO NOTHING" in query
+    assert values == {"recipe_id": 7}
+
+def test_claim_counts_reclaimed_leases(monkeypatch):
+    database = FakeDatabase()
+    monkeypatch.setattr(embedding_queue, "database", database)
+    asyncio.run(EmbeddingQueue().claim(16))
+    query, values, _ = database.statements[0]
+    assert "attempts = attempts + CASE WHEN status = 'running' THEN 1 ELSE 0 END" in query
+    assert values == {"batch_size": 16, "lease_seconds": settings.embedding_lease_seconds}
+
+@pytest.mark.parametrize("attempts, delay", [(0, 2), (1, 4), (3, 16)])
+def test_fail_backs_off_exponentially(monkeypatch, attempts, delay):
+    monkeypatch.setattr(settings, "embedding_retry_base_seconds", 2)
+    monkeypatch.setattr(settings, "embedding_retry_max_seconds", 300)
+    monkeypatch.setattr(settings, "embedding_max_attempts", 5)
+    database = FakeDatabase()
+    monkeypatch.setattr(embedding_queue, "database", database)
+
+    asyncio.run(EmbeddingQueue().fail(make_job(1, attempts=attempts), "boom"))
+
+    (query, values, _), = database.statements
+    assert "ON CONFLICT (recipe_id) WHERE status = 'queued' DO NOTHING" in query
+    assert values == {"job_id": 1, "delay": delay, "attempts": attempts + 1, "error": "boom"}
+
+def test_fail_caps_the_backoff(monkeypatch):
+    monkeypatch.setattr(settings, "embedding_retry_max_seconds", 10)
+    monkeypatch.setattr(settings, "embedding_max_attempts", 50)
+    database = FakeDatabase()
+    monkeypatch.setattr(embedding_queue, "database", database)
+    asyncio.run(EmbeddingQueue().fail(make_job(1, attempts=20), "boom"))
+    assert database.statements[0][1]["delay"] == 10
+
+def test_last_attempt_marks_job_and_recipe_failed(monkeypatch):
+    monkeypatch.setattr(settings, "embedding_max_attempts", 3)
+    database = FakeDatabase()
+    monkeypatch.setattr(embedding_queue, "database", database)
+
+    asyncio.run(EmbeddingQueue().fail(make_job(1, recipe_id=9, attempts=2), "boom"))
+
+    (job_query, job_values, job_depth), (recipe_query, recipe_values, recipe_depth) = database.statements
+    assert "SET status = 'failed'" in job_query
+    assert job_values == {"job_id": 1, "attempts": 3, "error": "boom"}
+    assert "embedding_status = 'failed'" in recipe_query
+    assert recipe_values == {"recipe_id": 9}
+    assert job_depth == recipe_depth == 1
+
+def test_exhausted_reclaimed_job_is_given_up(monkeypatch, indexed):
+    monkeypatch.setattr(settings, "embedding_max_attempts", 3)
+    pool = make_pool(monkeypatch, FakeDatabase({1: make_recipe(1), 2: make_recipe(2)}))
+
+    calls = run_batch(pool, [make_job(1, attempts=3), make_job(2, attempts=2)])
+
+    assert calls == [("give_up", 1), ("complete", 2)]
+    assert pool.semantic_service.batches == [1]
+    assert indexed == [2]
+
+def test_deleted_recipe_completes_without_indexing(monkeypatch, indexed):
+    pool = make_pool(monkeypatch, FakeDatabase({2: make_recipe(2)}))
+
+    calls = run_batch(pool, [make_job(1), make_job(2)])
+
+    assert calls == [("complete", 1), ("complete", 2)]
+    assert indexed == [2]
+    assert pool.neighbor_service.refreshed == [2]
+
+def test_stale_content_version_completes_without_indexing(monkeypatch, indexed):
+    database = FakeDatabase({1: make_recipe(1), 2: make_recipe(2)}, stale={1})
+    pool = make_pool(monkeypatch, database)
+
+    calls = run_batch(pool, [make_job(1), make_job(2)])
+
+    assert calls == [("complete", 1), ("complete", 2)]
+    assert indexed == [2]
+    store = [values for query, values, _ in database.statements if query.startswith("UPDATE recipes")]
+    assert [values["content_version"] for values in store] == [1, 1]
+
+def test_overload_releases_without_counting_an_attempt(monkeypatch, indexed):
+    semantic_service = FakeSemanticService(error=InferenceOverloaded("busy"))
+    pool = make_pool(monkeypatch, FakeDatabase({1: make_recipe(1), 2: make_recipe(2)}), semantic_service)
+
+    calls = run_batch(pool, [make_job(1), make_job(2)])
+
+    assert calls == [("release", 1), ("release", 2)]
+    assert indexed == []
+
+def test_timeout_splits_the_batch_and_fails_only_the_slow_recipe(monkeypatch, indexed):
+    recipes = {recipe_id: make_recipe(recipe_id) for recipe_id in range(1, 5)}
+    recipes[3] = make_recipe(3, title="slow roast")
+    pool = make_pool(monkeypatch, FakeDatabase(recipes))
+
+    calls = run_batch(pool, [make_job(recipe_id) for recipe_id in range(1, 5)])
+
+    assert sorted(calls) == [("complete", 1), ("complete", 2), ("complete", 4), ("fail", 3)]
+    assert sorted(indexed) == [1, 2, 4]
+    assert pool.semantic_service.batches == [4, 2, 2, 1, 1]
+
+def test_other_errors_count_an_attempt(monkeypatch, indexed):
+    semantic_service = FakeSemanticService(error=RuntimeError("model crashed"))
+    pool = make_pool(monkeypatch, FakeDatabase({1: make_recipe(1)}), semantic_service)
+
+    assert run_batch(pool, [make_job(1)]) == [("fail", 1)]
@@ -0,0 +1,100 @@
+import asyncio
+import threading
+import numpy as np
+import pytest
+from app.services import inference_executor
+from app.services.inference_executor import InferenceExecutor, InferenceOverloaded, InferenceTimeout
+
+class BlockingModel:
+    """Stands in for _encode; every call blocks until ``finish`` is set"""
+
+    def __init__(self):
+        self.finish = threading.Event()
+        self.started = threading.Semaphore(0)
+        self.calls = 0
+
+    def encode(self, model_name, texts):
+        self.calls += 1
+        self.started.release()
+        self.finish.wait(timeout=5)
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+@pytest.fixture
+def model(monkeypatch):
+    model = BlockingModel()
+    monkeypatch.setattr(inference_executor, "_encode", model.encode)
+    monkeypatch.setattr(inference_executor, "_init_worker", lambda model_name, torch_threads: None)
+    yield model
+    model.finish.set()
+
+def make_executor(**options):
+    return InferenceExecutor(**{"workers": 1, "torch_threads": 1, "max_queue": 1, "queue_timeout": 5.0, "timeout": 5.0, **options})
+
+async def wait_started(model):
+    await asyncio.get_running_loop().run_in_executor(None, model.started.acquire)
+
+def run(executor, scenario):
+    try:
+        return asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+def test_encode_returns_model_output(model):
+    executor = make_executor()
+    model.finish.set()
+    result = run(executor, lambda: executor.encode(["a", "b"]))
+    assert result.shape == (2, 4)
+
+def test_full_queue_is_rejected(model):
+    executor = make_executor(max_queue=1)
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.encode(["running"]))
+        await wait_started(model)
+        waiting = asyncio.ensure_future(executor.encode(["waiting"]))
+        await asyncio.sleep(0)
+        with pytest.raises(InferenceOverloaded, match="full"):
+            await executor.encode(["rejected"])
+        model.finish.set()
+        await asyncio.gather(running, waiting)
+
+    run(executor, scenario)
+    assert model.calls == 2
+
+def test_queue_timeout_is_rejected(model):
+    executor = make_executor(queue_timeout=0.05)
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.encode(["running"]))
+        await wait_started(model)
+        with pytest.raises(InferenceOverloaded, match="Timed out"):
+            await executor.encode(["waiting"])
+        assert executor._waiting == 0
+        model.finish.set()
+        await running
+
+    run(executor, scenario)
+    assert model.calls == 1
+
+def test_slow_call_times_out_and_holds_its_slot_until_it_finishes(model):
+    executor = make_executor(timeout=0.05, queue_timeout=0.05)
+
+    async def scenario():
+        with pytest.raises(InferenceTimeout):
+            await executor.encode(["slow"])
+        # The model is still running, so the slot is not free yet
+        assert executor._slots.locked()
+        with pytest.raises(InferenceOverloaded):
+            await executor.encode(["next"])
+
+        model.finish.set()
+        # The worker's done callback returns the slot through the loop
+        for _ in range(100):
+            if not executor._slots.locked():
+                break
+            await asyncio.sleep(0.01)
+        assert not executor._slots.locked()
+        return await executor.encode(["after"])
+
+    assert run(executor, scenario).shape == (1, 4)
+    assert model.calls == 2
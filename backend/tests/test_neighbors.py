@@ -0,0 +1,154 @@
+import asyncio
+import numpy as np
+import pytest
+from app.config import settings
+from app.services import neighbor_service
+from app.services.embedding_index import EMBEDDING_FIELDS, RecipeEmbeddingIndex
+from app.services.neighbor_service import NeighborService
+
+WEIGHTS = {"title": 1.0, "ingredients": 1.0, "instructions": 0.5}
+DIM = 8
+
+def random_vectors(rng):
+    return {field: rng.normal(size=DIM).astype(np.float32) for field in EMBEDDING_FIELDS}
+
+def unit(vector):
+    return vector / np.linalg.norm(vector)
+
+def brute_force_scores(vectors_by_id):
+    """Weighted per-field cosine between every pair of recipes"""
+    ids = sorted(vectors_by_id)
+    total = sum(WEIGHTS.values())
+    scores = np.zeros((len(ids), len(ids)))
+    for field in EMBEDDING_FIELDS:
+        matrix = np.array([unit(vectors_by_id[recipe_id][field]) for recipe_id in ids], dtype=np.float64)
+        scores += WEIGHTS[field] / total * (matrix @ matrix.T)
+    np.fill_diagonal(scores, -np.inf)
+    return ids, scores
+
+def brute_force_top_k(vectors_by_id, k):
+    ids, scores = brute_force_scores(vectors_by_id)
+    lists = {}
+    for row, recipe_id in enumerate(ids):
+        order = np.argsort(-scores[row], kind="stable")[:min(k, len(ids) - 1)]
+        lists[recipe_id] = ([ids[column] for column in order], scores[row, order].tolist())
+    return lists
+
+def build_index(vectors_by_id, capacity=4):
+    index = RecipeEmbeddingIndex(DIM, initial_capacity=capacity)
+    for recipe_id, vectors in vectors_by_id.items():
+        index.upsert(recipe_id, vectors)
+    return index
+
+@pytest.mark.parametrize("count, k, block_size", [(60, 5, 7), (60, 5, 1024), (4, 10, 2), (1, 3, 8)])
+def test_nearest_neighbors_match_brute_force(count, k, block_size):
+    rng = np.random.default_rng(count + k)
+    vectors_by_id = {recipe_id: random_vectors(rng) for recipe_id in range(100, 100 + count)}
+    index = build_index(vectors_by_id)
+
+    recipe_ids = list(vectors_by_id) + [9999]
+    lists = index.nearest_neighbors(recipe_ids, WEIGHTS, k, block_size)
+    expected = brute_force_top_k(vectors_by_id, k)
+
+    for recipe_id, (neighbor_ids, scores) in zip(recipe_ids, lists):
+        if recipe_id == 9999:
+            assert (neighbor_ids, scores) == ([], [])
+            continue
+        assert neighbor_ids == expected[recipe_id][0]
+        assert np.allclose(scores, expected[recipe_id][1], atol=1e-5)
+
+def test_nearest_neighbors_after_removal_and_update():
+    rng = np.random.default_rng(1)
+    vectors_by_id = {recipe_id: random_vectors(rng) for recipe_id in range(30)}
+    index = build_index(vectors_by_id)
+    for recipe_id in (0, 7, 29):
+        index.remove(recipe_id)
+        del vectors_by_id[recipe_id]
+    vectors_by_id[3] = random_vectors(rng)
+    index.upsert(3, vectors_by_id[3])
+
+    lists = index.nearest_neighbors(sorted(vectors_by_id), WEIGHTS, 4, 5)
+    expected = brute_force_top_k(vectors_by_id, 4)
+    assert [neighbor_ids for neighbor_ids, _ in lists] == [expected[recipe_id][0] for recipe_id in sorted(vectors_by_id)]
+
+class FakeNeighborTable:
+    """Answers the two recipe_neighbors queries of _lists_to_enter from stored lists"""
+
+    def __init__(self, lists):
+        self.last_scores = {recipe_id: scores[-1] for recipe_id, (_, scores) in lists.items()}
+        self.candidates = None
+
+    async def fetch_one(self, query, values=None):
+        return {"score": min(self.last_scores.values(), default=None)}
+
+    async def fetch_all(self, query, values=None):
+        self.candidates = values["recipe_ids"]
+        return [
+            {"recipe_id": recipe_id}
+            for recipe_id, score in zip(values["recipe_ids"], values["scores"])
+            if recipe_id in self.last_scores and self.last_scores[recipe_id] < score
+        ]
+
+def test_lists_to_enter_match_brute_force(monkeypatch):
+    k = 5
+    monkeypatch.setattr(settings, "neighbor_count", k)
+    rng = np.random.default_rng(2)
+    vectors_by_id = {recipe_id: random_vectors(rng) for recipe_id in range(1, 80)}
+    table = FakeNeighborTable(brute_force_top_k(vectors_by_id, k))
+    monkeypatch.setattr(neighbor_service, "database", table)
+
+    new_id = 500
+    vectors_by_id[new_id] = random_vectors(rng)
+    ids, scores = build_index(vectors_by_id).similarities(new_id, WEIGHTS)
+    entered = asyncio.run(NeighborService()._lists_to_enter(ids, scores))
+
+    after = brute_force_top_k(vectors_by_id, k)
+    expected = {recipe_id for recipe_id in after if recipe_id != new_id and new_id in after[recipe_id][0]}
+    assert set(entered) == expected
+    assert entered
+    # Only recipes above the lowest last-ranked score are sent to the database
+    assert new_id not in table.candidates
+    assert len(table.candidates) < len(ids) - 1
+
+def test_lists_to_enter_returns_everything_while_lists_are_not_full(monkeypatch):
+    monkeypatch.setattr(settings, "neighbor_count", 10)
+    ids = np.array([1, 2, 3], dtype=np.int64)
+    scores = np.array([0.5, -np.inf, 0.1], dtype=np.float32)
+    assert asyncio.run(NeighborService()._lists_to_enter(ids, scores)) == [1, 2, 3]
+
+class RecordingDatabase:
+    def __init__(self):
+        self.statements = []
+        self.in_transaction = False
+
+    def transaction(self):
+        database = self
+
+        class Transaction:
+            async def __aenter__(self):
+                database.in_transaction = True
+
+            async def __aexit__(self, *exc_info):
+                database.in_transaction = False
+
+        return Transaction()
+
+    async def execute(self, query, values=None):
+        self.statements.append((" ".join(query.split()), self.in_transaction))
+
+    async def execute_many(self, query, values):
+        self.statements.append((" ".join(query.split()), self.in_transaction))
+
+def test_recompute_takes_the_advisory_lock_before_writing(monkeypatch):
+    database = RecordingDatabase()
+    monkeypatch.setattr(neighbor_service, "database", database)
+    rng = np.random.default_rng(3)
+    index = build_index({recipe_id: random_vectors(rng) for recipe_id in range(1, 6)})
+
+    asyncio.run(NeighborService()._recompute(index, [1, 2]))
+
+    queries = [query for query, in_transaction in database.statements if in_transaction]
+    assert len(queries) == len(database.statements) == 3
+    assert queries[0].startswith("SELECT pg_advisory_xact_lock")
+    assert queries[1].startswith("DELETE FROM recipe_neighbors")
+    assert queries[2].startswith("INSERT INTO recipe_neighbors")
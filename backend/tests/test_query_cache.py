@@ -0,0 +1,107 @@
+import asyncio
+import numpy as np
+from app.services.query_cache import SemanticQueryCache
+
+def make_cache() -> SemanticQueryCache:
+    return SemanticQueryCache(max_entries=4, threshold=0.95, dim=3)
+
+def test_coalesce_runs_factory_once():
+    async def scenario():
+        cache = make_cache()
+        calls = 0
+        release = asyncio.Event()
+
+        async def factory():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return [1, 2]
+
+        waiters = [asyncio.ensure_future(cache.coalesce("key", factory)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters)
+        return calls, results, cache._inflight
+
+    calls, results, inflight = asyncio.run(scenario())
+    assert calls == 1
+    assert results == [[1, 2]] * 5
+    assert inflight == {}
+
+def test_cancelled_leader_does_not_cancel_followers():
+    async def scenario():
+        cache = make_cache()
+        release = asyncio.Event()
+
+        async def factory():
+            await release.wait()
+            return "result"
+
+        leader = asyncio.ensure_future(cache.coalesce("key", factory))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(cache.coalesce("key", factory))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return leader, await follower
+
+    leader, result = asyncio.run(scenario())
+    assert leader.cancelled()
+    assert result == "result"
+
+def test_coalesce_propagates_errors_and_clears_key():
+    async def scenario():
+        cache = make_cache()
+
+        async def failing():
+            await asyncio.sleep(0)
+            raise RuntimeError("boom")
+
+        outcomes = await asyncio.gather(
+            cache.coalesce("key", failing), cache.coalesce("key", failing), return_exceptions=True
+        )
+
+        async def succeeding():
+            return "ok"
+
+        return outcomes, await cache.coalesce("key", succeeding)
+
+    outcomes, retry = asyncio.run(scenario())
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+    assert retry == "ok"
+
+def test_lookup_matches_similar_vectors_in_the_same_scope():
+    cache = make_cache()
+    cache.store(np.array([1.0, 0.0, 0.0]), [7], [0.9], 1, cache.generation, scope="a")
+
+    assert cache.lookup(np.array([1.0, 0.05, 0.0]), 1, scope="a") == ([7], [0.9])
+    assert cache.lookup(np.array([1.0, 0.05, 0.0]), 1, scope="b") is None
+    assert cache.lookup(np.array([0.0, 1.0, 0.0]), 1, scope="a") is None
+
+def test_invalidate_drops_rankings_and_rejects_stale_stores():
+    cache = make_cache()
+    generation = cache.generation
+    cache.store(np.array([1.0, 0.0, 0.0]), [7], [0.9], 1, generation)
+    cache.invalidate()
+
+    assert cache.lookup(np.array([1.0, 0.0, 0.0]), 1) is None
+    cache.store(np.array([1.0, 0.0, 0.0]), [7], [0.9], 1, generation)
+    assert cache.lookup(np.array([1.0, 0.0, 0.0]), 1) is None
+
+def test_truncated_ranking_only_serves_limits_it_covers():
+    cache = make_cache()
+    cache.store(np.array([1.0, 0.0, 0.0]), [1, 2], [0.9, 0.8], 2, cache.generation)
+
+    assert cache.lookup(np.array([1.0, 0.0, 0.0]), 2) == ([1, 2], [0.9, 0.8])
+    assert cache.lookup(np.array([1.0, 0.0, 0.0]), 3) is None
+
+    # A nearby query whose ranking was long enough is used instead
+    cache.store(np.array([1.0, 0.1, 0.0]), [1, 2, 3], [0.9, 0.8, 0.7], 5, cache.generation)
+    assert cache.lookup(np.array([1.0, 0.0, 0.0]), 3) == ([1, 2, 3], [0.9, 0.8, 0.7])
+
+def test_complete_ranking_serves_any_limit():
+    cache = make_cache()
+    # Only two recipes exist, so asking for 100 returned the whole ranking
+    cache.store(np.array([1.0, 0.0, 0.0]), [1, 2], [0.9, 0.8], 100, cache.generation)
+    assert cache.lookup(np.array([1.0, 0.0, 0.0]), 500) == ([1, 2], [0.9, 0.8])
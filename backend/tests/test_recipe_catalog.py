@@ -0,0 +1,157 @@
+import random
+import pytest
+from app.services.recipe_catalog import RecipeCatalog
+
+CUISINES = ["Italian", "italian", "Mexican", "Thai", "Greek"]
+DIFFICULTIES = ["easy", "Medium", "medium", "hard"]
+WORDS = ["pasta", "chicken", "spicy", "quick", "soup", "garlic", "lemon", "tofu"]
+
+def make_recipe(recipe_id: int, **overrides) -> dict:
+    recipe = {
+        "id": recipe_id,
+        "title": f"Recipe {recipe_id}",
+        "description": "A tasty dish",
+        "ingredients": ["salt"],
+        "instructions": "Cook it.",
+        "prep_time": 10,
+        "cook_time": None,
+        "servings": 2,
+        "difficulty": "easy",
+        "cuisine": "Italian",
+        "tags": ["dinner"],
+        "created_at": "2024-10-09T00:00:00Z",
+        "updated_at": "2024-10-09T00:00:00Z"
+    }
+    recipe.update(overrides)
+    return recipe
+
+def random_recipes(count: int):
+    rng = random.Random(7)
+    return [
+        make_recipe(
+            recipe_id,
+            title=" ".join(rng.choices(WORDS, k=3)).title(),
+            description=" ".join(rng.choices(WORDS, k=6)),
+            difficulty=rng.choice(DIFFICULTIES),
+            cuisine=rng.choice(CUISINES),
+            created_at=f"2024-10-{rng.randint(1, 28):02d}T00:00:00Z"
+        )
+        for recipe_id in range(1, count + 1)
+    ]
+
+def query_dict_list(recipes, page, size, search=None, cuisine=None, difficulty=None):
+    """The list filter recipes_simple used before RecipeCatalog"""
+    filtered_recipes = recipes.copy()
+    if search:
+        filtered_recipes = [r for r in filtered_recipes if
+                            search.lower() in r.get("title", "").lower() or
+                            search.lower() in r.get("description", "").lower()]
+    if cuisine:
+        filtered_recipes = [r for r in filtered_recipes if r.get("cuisine", "").lower() == cuisine.lower()]
+    if difficulty:
+        filtered_recipes = [r for r in filtered_recipes if r.get("difficulty", "").lower() == difficulty.lower()]
+    start = (page - 1) * size
+    return filtered_recipes[start:start + size], len(filtered_recipes)
+
+@pytest.fixture
+def recipes():
+    return random_recipes(300)
+
+@pytest.fixture
+def catalog(recipes):
+    catalog = RecipeCatalog()
+    catalog.extend(recipes)
+    return catalog
+
+@pytest.mark.parametrize("params", [
+    dict(page=1, size=10),
+    dict(page=7, size=25),
+    dict(page=100, size=10),
+    dict(page=1, size=10, cuisine="ITALIAN"),
+    dict(page=2, size=10, difficulty="medium"),
+    dict(page=1, size=50, cuisine="thai", difficulty="Hard"),
+    dict(page=1, size=50, cuisine="Greek", difficulty="MEDIUM"),
+    dict(page=1, size=10, cuisine="Korean"),
+    dict(page=1, size=10, search="Lemon"),
+    dict(page=2, size=5, search="garlic", cuisine="mexican"),
+    dict(page=1, size=20, search="tofu", cuisine="italian", difficulty="easy"),
+    dict(page=1, size=10, search="no such dish"),
+])
+def test_query_matches_list_filter(recipes, catalog, params):
+    assert catalog.query(**params) == query_dict_list(recipes, **params)
+
+def test_combined_cuisine_and_difficulty_filters(catalog, recipes):
+    page, total = catalog.query(page=1, size=1000, cuisine="italian", difficulty="medium")
+    expected = [
+        r["id"] for r in recipes
+        if r["cuisine"].lower() == "italian" and r["difficulty"].lower() == "medium"
+    ]
+    assert [r["id"] for r in page] == expected
+    assert total == len(expected)
+
+@pytest.mark.parametrize("page", [0, -1])
+def test_page_below_one_is_empty(catalog, recipes, page):
+    assert catalog.query(page=page, size=10) == ([], len(recipes))
+    assert catalog.query(page=page, size=10, cuisine="Thai")[0] == []
+
+def test_optional_fields_can_be_none():
+    catalog = RecipeCatalog()
+    catalog.add(make_recipe(1, description=None, cuisine=None, difficulty=None, prep_time=None))
+    catalog.add(make_recipe(2, title="Garlic soup"))
+
+    page, total = catalog.query()
+    assert total == 2
+    assert page[0]["description"] is None
+    assert page[0]["cuisine"] is None
+    assert page[0]["difficulty"] is None
+    assert page[0]["prep_time"] is None
+    assert catalog.query(search="garlic") == ([page[1]], 1)
+    assert catalog.query(search="tasty") == ([page[1]], 1)
+    assert catalog.query(cuisine="italian") == ([page[1]], 1)
+    assert catalog.query(cuisine="italian", difficulty="easy") == ([page[1]], 1)
+
+def test_round_trip_keeps_every_field():
+    recipe = make_recipe(42, tags=["a", "b"], ingredients=["x", "y"], updated_at="2024-11-01T00:00:00Z")
+    catalog = RecipeCatalog()
+    catalog.add(recipe)
+    assert catalog.get_row(0) == recipe
+
+def test_failed_add_leaves_catalog_unchanged(catalog, recipes):
+    before = catalog.query(page=1, size=1000)
+    with pytest.raises(OverflowError):
+        catalog.add(make_recipe(1000, cuisine="Nordic", servings=2 ** 31))
+    with pytest.raises(TypeError):
+        catalog.add(make_recipe(1001, cuisine="Nordic", difficulty=3))
+
+    assert len(catalog) == len(recipes)
+    assert catalog.query(page=1, size=1000) == before
+    assert catalog.query(cuisine="Nordic") == ([], 0)
+    catalog.add(make_recipe(1002, cuisine="Nordic"))
+    assert [r["id"] for r in catalog.query(cuisine="nordic")[0]] == [1002]
+
+def test_search_counts_each_row_once_and_ignores_case_beyond_ascii():
+    catalog = RecipeCatalog()
+    catalog.add(make_recipe(1, title="Crème Brûlée", description="crème, more crème"))
+    catalog.add(make_recipe(2, title="Soup", description=None))
+    catalog.add(make_recipe(3, title="CRÈME caramel"))
+
+    assert [r["id"] for r in catalog.query(search="CRÈME")[0]] == [1, 3]
+    assert catalog.query(search="crème")[1] == 2
+    assert catalog.query(search="brûlée")[0][0]["title"] == "Crème Brûlée"
+    # Titles and descriptions are separate fields, and so are rows
+    assert catalog.query(search="brûlée crème") == ([], 0)
+    assert catalog.query(search="soupcrème") == ([], 0)
+    assert catalog.query(search="\0") == ([], 0)
+
+def test_search_within_filtered_rows(catalog, recipes):
+    params = dict(page=1, size=1000, search="soup", cuisine="greek", difficulty="hard")
+    assert catalog.query(**params) == query_dict_list(recipes, **params)
+
+def test_ingredients_and_tags_round_trip_through_interned_codes():
+    catalog = RecipeCatalog()
+    catalog.add(make_recipe(1, ingredients=["salt", "pepper"], tags=[]))
+    catalog.add(make_recipe(2, ingredients=[], tags=["quick", "salt"]))
+    catalog.add(make_recipe(3, ingredients=["pepper", "salt", "salt"], tags=None))
+
+    assert [catalog.get_row(row)["ingredients"] for row in range(3)] == [["salt", "pepper"], [], ["pepper", "salt", "salt"]]
+    assert [catalog.get_row(row)["tags"] for row in range(3)] == [[], ["quick", "salt"], []]
@@ -0,0 +1,120 @@
+import asyncio
+import numpy as np
+import pytest
+from app.config import settings
+from app.services import semantic_search_service
+from app.services.embedding_index import EMBEDDING_FIELDS, encode_vector
+from app.services.inference_executor import InferenceOverloaded, InferenceTimeout
+from app.services.semantic_search_service import SemanticSearchService
+
+def make_vectors(seed: int):
+    rng = np.random.default_rng(seed)
+    return {field: rng.normal(size=settings.embedding_dimension).astype(np.float32) for field in EMBEDDING_FIELDS}
+
+def make_row(recipe_id: int):
+    row = {"id": recipe_id}
+    row.update({f"{field}_embedding": encode_vector(vector) for field, vector in make_vectors(recipe_id).items()})
+    return row
+
+class FakeDatabase:
+    """Returns a fixed snapshot of rows and runs ``during_fetch`` while the query is in flight"""
+
+    def __init__(self, rows, during_fetch):
+        self.rows = rows
+        self.during_fetch = during_fetch
+
+    async def fetch_all(self, query, values=None):
+        await asyncio.sleep(0)
+        self.during_fetch()
+        return self.rows
+
+@pytest.fixture(autouse=True)
+def fresh_index(monkeypatch):
+    monkeypatch.setattr(SemanticSearchService, "_index", None)
+    monkeypatch.setattr(SemanticSearchService, "_pending_changes", None)
+
+def test_changes_during_initial_load_are_applied(monkeypatch):
+    def concurrent_writes():
+        SemanticSearchService.index_recipe(3, make_vectors(3))
+        SemanticSearchService.remove_from_index(2)
+        SemanticSearchService.index_recipe(1, make_vectors(100))
+
+    # The snapshot was read before the writes above committed
+    monkeypatch.setattr(semantic_search_service, "database", FakeDatabase([make_row(1), make_row(2)], concurrent_writes))
+    index = asyncio.run(SemanticSearchService().get_index())
+
+    assert sorted(index.ids().tolist()) == [1, 3]
+    ids, _ = index.search(make_vectors(100)["title"], {"title": 1.0}, 1)
+    assert ids == [1]
+    assert SemanticSearchService._pending_changes is None
+
+def test_changes_are_not_buffered_without_a_load():
+    SemanticSearchService.index_recipe(1, make_vectors(1))
+    SemanticSearchService.remove_from_index(1)
+    assert SemanticSearchService._index is None
+    assert SemanticSearchService._pending_changes is None
+
+def test_failed_load_stops_buffering(monkeypatch):
+    class BrokenDatabase:
+        async def fetch_all(self, query, values=None):
+            raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(semantic_search_service, "database", BrokenDatabase())
+    with pytest.raises(RuntimeError):
+        asyncio.run(SemanticSearchService().get_index())
+    assert SemanticSearchService._index is None
+    assert SemanticSearchService._pending_changes is None
+
+class FlakyInference:
+    """Raises the queued errors in order, then returns one embedding per text"""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def encode(self, texts):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return np.ones((len(texts), settings.embedding_dimension), dtype=np.float32)
+
+def make_service(errors):
+    service = SemanticSearchService.__new__(SemanticSearchService)
+    service.inference = FlakyInference(errors)
+    return service
+
+@pytest.mark.parametrize("error", [InferenceOverloaded("busy"), InferenceTimeout("slow")])
+def test_field_embeddings_raise_inference_pressure(error):
+    with pytest.raises(type(error)):
+        asyncio.run(make_service([error]).generate_field_embeddings("Soup", None, ["salt"], "Boil."))
+
+def test_field_embeddings_swallow_other_errors():
+    assert asyncio.run(make_service([RuntimeError("boom")]).generate_field_embeddings("Soup", None, [], "Boil.")) is None
+
+class ReindexDatabase:
+    def __init__(self, recipe_ids):
+        self.recipes = [
+            {"id": recipe_id, "title": f"Recipe {recipe_id}", "description": None, "ingredients": '["salt"]', "instructions": "Cook."}
+            for recipe_id in recipe_ids
+        ]
+        self.updated = []
+
+    async def fetch_all(self, query, values=None):
+        return self.recipes
+
+    async def execute(self, query, values=None):
+        self.updated.append(values["recipe_id"])
+
+def test_reindex_retries_inference_pressure_and_counts_skipped(monkeypatch):
+    monkeypatch.setattr(settings, "embedding_max_attempts", 3)
+    monkeypatch.setattr(settings, "embedding_retry_base_seconds", 0)
+    database = ReindexDatabase([1, 2])
+    monkeypatch.setattr(semantic_search_service, "database", database)
+    indexed = []
+    monkeypatch.setattr(SemanticSearchService, "index_recipe", classmethod(lambda cls, recipe_id, vectors: indexed.append(recipe_id)))
+    # Recipe 1 fails all three attempts; recipe 2 succeeds on its second
+    service = make_service([InferenceOverloaded("busy")] + [InferenceTimeout("slow")] * 3)
+
+    assert asyncio.run(service.reindex_all_recipes()) == 1
+    assert database.updated == indexed == [2]
+    assert service.inference.calls == 5